@@ -14,7 +14,8 @@ CREATE TABLE locations (
     longitude DECIMAL(9,6),
     country VARCHAR(100),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (city, district)
 );
 
 -- Create table for air quality readings
@@ -30,13 +31,14 @@ CREATE TABLE readings (
     health_recommendation TEXT,
     source_name VARCHAR(100),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (location_id, timestamp, parameter)
 );
 
 -- Create index on timestamp for efficient queries
-CREATE INDEX idx_readings_timestamp ON readings(timestamp);
+CREATE INDEX idx_readings_timestamp_parameter ON readings(timestamp, parameter);
 CREATE INDEX idx_readings_parameter ON readings(parameter);
-CREATE INDEX idx_readings_location_parameter ON readings(location_id, parameter);
+CREATE INDEX idx_readings_location_parameter_timestamp ON readings(location_id, parameter, timestamp DESC);
 
 -- Create table for weather conditions (optional)
 CREATE TABLE weather_conditions (
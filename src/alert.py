@@ -1,24 +1,18 @@
 # src/alert.py
 
 import pandas as pd
+import numpy as np
 import logging
-import psycopg2
 from datetime import datetime
 import os
-import json
+import orjson
 import smtplib
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 # Import configuration
 from config import (
-    DB_NAME,
-    DB_USER,
-    DB_PASSWORD,
-    DB_HOST,
-    DB_PORT,
-    LOG_FILE,
-    LOG_LEVEL,
     ALERT_LOG_DIR,
     EMAIL_ENABLED,
     EMAIL_SENDER,
@@ -28,41 +22,18 @@ from config import (
     EMAIL_SMTP_PORT
 )
 
+from log_setup import setup_logging
+from db_pool import connect_to_db, release_connection, read_sql_arrow
+
 # Set up logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Create alert log directory if it doesn't exist
 os.makedirs(ALERT_LOG_DIR, exist_ok=True)
 
-def connect_to_db():
-    """
-    Connect to the PostgreSQL database.
-    
-    Returns:
-        connection: PostgreSQL database connection
-    """
-    try:
-        logger.info(f"Connecting to database {DB_NAME} on {DB_HOST}")
-        connection = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
-        logger.info("Database connection established")
-        return connection
-    except Exception as e:
-        logger.error(f"Error connecting to database: {e}")
-        return None
+# Timestamp format used in alert log filenames
+FILE_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
 
 def get_latest_readings(connection):
     """
@@ -77,38 +48,29 @@ def get_latest_readings(connection):
     try:
         # SQL query to get the latest reading for each location-parameter combination
         query = """
-        WITH latest_readings AS (
-            SELECT 
-                location_id,
-                parameter,
-                MAX(timestamp) as latest_timestamp
-            FROM readings
-            GROUP BY location_id, parameter
-        )
-        SELECT 
-            r.reading_id,
-            r.timestamp,
-            r.parameter,
-            r.value,
-            r.unit,
-            r.aqi,
-            r.aqi_category,
-            r.health_recommendation,
-            l.city,
-            l.district,
-            l.latitude,
-            l.longitude
-        FROM readings r
-        JOIN locations l ON r.location_id = l.location_id
-        JOIN latest_readings lr ON 
-            r.location_id = lr.location_id AND 
-            r.parameter = lr.parameter AND 
-            r.timestamp = lr.latest_timestamp
-        ORDER BY l.city, r.parameter
+        SELECT * FROM (
+            SELECT DISTINCT ON (r.location_id, r.parameter)
+                r.reading_id,
+                r.timestamp,
+                r.parameter,
+                r.value,
+                r.unit,
+                r.aqi,
+                r.aqi_category,
+                r.health_recommendation,
+                l.city,
+                l.district,
+                l.latitude,
+                l.longitude
+            FROM readings r
+            JOIN locations l ON r.location_id = l.location_id
+            ORDER BY r.location_id, r.parameter, r.timestamp DESC
+        ) latest_readings
+        ORDER BY city, parameter
         """
         
         # Execute query
-        df = pd.read_sql_query(query, connection)
+        df = read_sql_arrow(connection, query)
         
         logger.info(f"Retrieved {len(df)} latest readings from database")
         return df
@@ -126,8 +88,6 @@ def check_for_alerts(df):
     Returns:
         list: List of alerts
     """
-    alerts = []
-    
     # Define alert thresholds
     thresholds = {
         'pm25': {
@@ -144,75 +104,106 @@ def check_for_alerts(df):
         }
     }
     
-    # Check each reading against thresholds
-    for idx, row in df.iterrows():
-        parameter = row['parameter']
-        value = row['value']
-        city = row['city']
-        district = row['district']
-        aqi = row['aqi']
-        aqi_category = row['aqi_category']
-        
-        if parameter in thresholds:
-            if value >= thresholds[parameter]['Severe']:
-                severity = 'Severe'
-                logger.warning(f"SEVERE ALERT: {parameter} in {city} is {value} (AQI: {aqi}, {aqi_category})")
-            elif value >= thresholds[parameter]['High']:
-                severity = 'High'
-                logger.warning(f"HIGH ALERT: {parameter} in {city} is {value} (AQI: {aqi}, {aqi_category})")
-            else:
-                continue  # No alert needed
-            
-            # Create alert
-            alert = {
-                'timestamp': datetime.now().isoformat(),
-                'city': city,
-                'district': district,
-                'parameter': parameter,
-                'value': float(value),
-                'unit': row['unit'],
-                'aqi': int(aqi),
-                'aqi_category': aqi_category,
-                'severity': severity,
-                'message': f"{severity} {parameter} levels in {city} {district}. Value: {value}, AQI: {aqi}, Category: {aqi_category}",
-                'health_recommendation': row['health_recommendation']
-            }
-            
-            alerts.append(alert)
+    # Attach the thresholds to each reading; parameters without thresholds drop out
+    thresholds_df = pd.DataFrame.from_dict(thresholds, orient='index')
+    merged = df.merge(thresholds_df, left_on='parameter', right_index=True, how='inner')
+    
+    # Classify every reading in one pass
+    severity = np.select(
+        [merged['value'] >= merged['Severe'], merged['value'] >= merged['High']],
+        ['Severe', 'High'],
+        default=''
+    )
+    alert_df = merged[severity != ''].assign(severity=severity[severity != ''])
+    
+    # Build alert fields as whole columns
+    alert_df = alert_df.assign(
+        timestamp=datetime.now().isoformat(),
+        value=alert_df['value'].astype(float),
+        aqi=alert_df['aqi'].astype(int),
+        message=(
+            alert_df['severity'] + " " + alert_df['parameter'] + " levels in " +
+            alert_df['city'] + " " + alert_df['district'].astype(str) +
+            ". Value: " + alert_df['value'].astype(str) +
+            ", AQI: " + alert_df['aqi'].astype(str) +
+            ", Category: " + alert_df['aqi_category']
+        )
+    )
+    
+    alert_columns = [
+        'timestamp', 'city', 'district', 'parameter', 'value', 'unit', 'aqi',
+        'aqi_category', 'severity', 'message', 'health_recommendation'
+    ]
+    alerts = alert_df[alert_columns].to_dict(orient='records')
+    
+    for alert in alerts:
+        logger.warning(
+            f"{alert['severity'].upper()} ALERT: {alert['parameter']} in {alert['city']} is "
+            f"{alert['value']} (AQI: {alert['aqi']}, {alert['aqi_category']})"
+        )
     
     logger.info(f"Found {len(alerts)} alerts in the latest readings")
     return alerts
 
-def log_alerts(alerts):
+def log_alerts(alerts, timestamp=None):
     """
     Log alerts to file.
     
     Args:
         alerts: List of alert dictionaries
+        timestamp: Run timestamp used in the filename; defaults to now
     """
     if not alerts:
         logger.info("No alerts to log")
         return
     
     # Create log filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if timestamp is None:
+        timestamp = datetime.now().strftime(FILE_TIMESTAMP_FORMAT)
     log_filename = os.path.join(ALERT_LOG_DIR, f"alerts_{timestamp}.json")
     
     # Write alerts to log file
     try:
-        with open(log_filename, 'w') as f:
-            json.dump(alerts, f, indent=2)
+        with open(log_filename, 'wb') as f:
+            f.write(orjson.dumps(alerts, option=orjson.OPT_INDENT_2))
         
         logger.info(f"Logged {len(alerts)} alerts to {log_filename}")
     except Exception as e:
         logger.error(f"Error logging alerts to file: {e}")
 
-def send_alert_email(alerts):
+@contextmanager
+def smtp_session():
+    """
+    Open an authenticated SMTP connection for the duration of a block.
+    
+    Port 465 uses implicit TLS, which skips the STARTTLS round trip.
+    
+    Yields:
+        SMTP: Logged-in SMTP connection
+    """
+    if EMAIL_SMTP_PORT == 465:
+        server = smtplib.SMTP_SSL(EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT)
+    else:
+        server = smtplib.SMTP(EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT)
+        server.starttls()
+    
+    try:
+        server.login(EMAIL_SENDER, EMAIL_PASSWORD)
+        yield server
+    finally:
+        try:
+            server.quit()
+        except smtplib.SMTPException:
+            server.close()
+
+def send_alert_email(alerts, server=None):
     """
     Send email notifications for alerts.
     
     Args:
         alerts: List of alert dictionaries
+        server: Open SMTP connection from smtp_session; a new session is
+            opened for this message if not given
     """
     if not EMAIL_ENABLED or not alerts:
         return
@@ -236,13 +227,13 @@ def send_alert_email(alerts):
         
         msg.attach(MIMEText(body, 'plain'))
         
-        # Connect to server and send email
-        server = smtplib.SMTP(EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT)
-        server.starttls()
-        server.login(EMAIL_SENDER, EMAIL_PASSWORD)
+        # Send email, connecting first if no session was given
         text = msg.as_string()
-        server.sendmail(EMAIL_SENDER, EMAIL_RECIPIENTS, text)
-        server.quit()
+        if server is None:
+            with smtp_session() as server:
+                server.sendmail(EMAIL_SENDER, EMAIL_RECIPIENTS, text)
+        else:
+            server.sendmail(EMAIL_SENDER, EMAIL_RECIPIENTS, text)
         
         logger.info(f"Sent alert email to {', '.join(EMAIL_RECIPIENTS)}")
     except Exception as e:
@@ -251,6 +242,7 @@ def send_alert_email(alerts):
 def main():
     """Main function to check for air quality alerts."""
     logger.info("Starting air quality alert check")
+    run_timestamp = datetime.now().strftime(FILE_TIMESTAMP_FORMAT)
     
     # Connect to database
     connection = connect_to_db()
@@ -270,18 +262,22 @@ def main():
         alerts = check_for_alerts(df)
         
         # Log alerts
-        log_alerts(alerts)
+        log_alerts(alerts, run_timestamp)
         
-        # Send email notifications
-        if alerts:
-            send_alert_email(alerts)
+        # Send email notifications over a single SMTP session
+        if alerts and EMAIL_ENABLED:
+            try:
+                with smtp_session() as server:
+                    send_alert_email(alerts, server)
+            except Exception as e:
+                logger.error(f"Error connecting to SMTP server: {e}")
         
         logger.info("Alert check completed successfully")
     except Exception as e:
         logger.error(f"Error in alert check process: {e}")
     finally:
-        connection.close()
-        logger.info("Database connection closed")
+        release_connection(connection)
+        logger.info("Database connection returned to pool")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
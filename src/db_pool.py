@@ -0,0 +1,121 @@
+# src/db_pool.py
+
+import atexit
+import io
+import logging
+from contextlib import contextmanager
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from psycopg2 import pool
+from psycopg2.extensions import encodings
+
+# Import configuration
+from config import (
+    DB_NAME,
+    DB_USER,
+    DB_PASSWORD,
+    DB_HOST,
+    DB_PORT
+)
+
+logger = logging.getLogger(__name__)
+
+DB_KWARGS = {
+    'dbname': DB_NAME,
+    'user': DB_USER,
+    'password': DB_PASSWORD,
+    'host': DB_HOST,
+    'port': DB_PORT
+}
+
+# Shared by every module in the process, so scheduled runs reuse open connections
+_pool = None
+
+def get_pool():
+    """
+    Get the process-wide connection pool, creating it on first use.
+
+    Returns:
+        ThreadedConnectionPool: Shared PostgreSQL connection pool
+    """
+    global _pool
+    if _pool is None:
+        logger.info(f"Creating connection pool for database {DB_NAME} on {DB_HOST}")
+        _pool = pool.ThreadedConnectionPool(minconn=1, maxconn=25, **DB_KWARGS)
+    return _pool
+
+def connect_to_db():
+    """
+    Take a connection from the shared pool.
+
+    Returns:
+        connection: PostgreSQL database connection, or None on failure
+    """
+    try:
+        connection = get_pool().getconn()
+        logger.info("Database connection taken from pool")
+        return connection
+    except Exception as e:
+        logger.error(f"Error connecting to database: {e}")
+        return None
+
+def release_connection(connection):
+    """
+    Return a connection to the shared pool.
+
+    Args:
+        connection: PostgreSQL database connection from connect_to_db
+    """
+    get_pool().putconn(connection)
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a connection from the shared pool for the duration of a block.
+
+    Yields:
+        connection: PostgreSQL database connection
+    """
+    connection = get_pool().getconn()
+    try:
+        yield connection
+    finally:
+        get_pool().putconn(connection)
+
+def read_sql_arrow(connection, query, params=None):
+    """
+    Run a query through COPY and decode the result with Arrow's CSV reader.
+
+    Rows are streamed as CSV and parsed straight into columnar buffers, so no
+    Python object is created per cell as with cursor.fetchall().
+
+    Args:
+        connection: PostgreSQL database connection
+        query: SELECT statement, optionally with %s placeholders
+        params: Parameters interpolated into the query
+
+    Returns:
+        DataFrame: Query result
+    """
+    cursor = connection.cursor()
+    try:
+        select_sql = cursor.mogrify(query, params).decode(encodings[connection.encoding])
+        buffer = io.BytesIO()
+        cursor.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH CSV HEADER", buffer)
+    finally:
+        cursor.close()
+
+    table = pa_csv.read_csv(
+        pa.py_buffer(buffer.getvalue()),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+    )
+    return table.to_pandas()
+
+def close_pool():
+    """Close every connection held by the shared pool."""
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+atexit.register(close_pool)
@@ -0,0 +1,226 @@
+# src/df_cache.py
+
+import os
+import hashlib
+import logging
+import functools
+import inspect
+import tempfile
+import time
+import pandas as pd
+
+# Import configuration
+from config import PROCESSED_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(PROCESSED_DATA_DIR, "_cache")
+
+# DataFrames kept in memory per decorated function
+MEMORY_CACHE_ENTRIES = 64
+
+# Oldest cache entries beyond this count are removed after each write
+CACHE_MAX_ENTRIES = 64
+
+# Entries are written under this suffix and renamed into place once complete
+TEMP_SUFFIX = '.tmp'
+
+# Temporary files older than this were left by an interrupted write
+STALE_TEMP_SECONDS = 3600
+
+def cache_key(func, path):
+    """
+    Build a cache key that changes whenever the file at path or the code
+    defining func changes.
+
+    Args:
+        func: Function whose result is cached
+        path (str): File the function reads
+
+    Returns:
+        str: Hex digest identifying the function and file version
+    """
+    stat = os.stat(path)
+    source_mtime = os.stat(inspect.getsourcefile(func)).st_mtime_ns
+    raw_key = f"{func.__module__}.{func.__qualname__}|{source_mtime}|{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(raw_key.encode()).hexdigest()
+
+def prune_cache():
+    """
+    Remove the oldest cache entries beyond CACHE_MAX_ENTRIES.
+
+    Temporary files of writes still in progress are left alone; ones older
+    than STALE_TEMP_SECONDS were abandoned by an interrupted write and are
+    removed.
+    """
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        if not entry.is_file():
+            continue
+        if entry.name.endswith(TEMP_SUFFIX):
+            if time.time() - entry.stat().st_mtime > STALE_TEMP_SECONDS:
+                os.remove(entry.path)
+            continue
+        entries.append(entry)
+
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[CACHE_MAX_ENTRIES:]:
+        os.remove(entry.path)
+
+def read_cache_entry(cache_path):
+    """
+    Read a cached DataFrame, treating missing or unreadable entries as a miss.
+
+    An entry that cannot be unpickled (for example one left truncated by an
+    older, non-atomic write) is deleted so it is recomputed.
+
+    Args:
+        cache_path (str): Path of the cache entry
+
+    Returns:
+        DataFrame: Cached data, or None on a miss
+    """
+    try:
+        return pd.read_pickle(cache_path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Discarding unreadable cache entry {cache_path}: {e}")
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+
+def write_cache_entry(df, cache_path):
+    """
+    Write a DataFrame to the cache so readers never see a partial entry.
+
+    The pickle is written to a temporary file in CACHE_DIR and renamed into
+    place, so a crash leaves no entry and concurrent writers of the same key
+    each replace it with a complete copy.
+
+    Args:
+        df (DataFrame): Data to cache
+        cache_path (str): Path of the cache entry
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            df.to_pickle(f)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    prune_cache()
+
+def memory_cache(func):
+    """
+    Cache the DataFrame a file-reading function returns, in memory only.
+
+    For files whose names change on every run, such as timestamped raw
+    extracts, where a disk entry would never be reused and would only push
+    reusable entries out of CACHE_DIR. The decorated function must take the
+    file path as its only argument; results are keyed like disk_cache and
+    callers always receive their own copy.
+    """
+    @functools.lru_cache(maxsize=MEMORY_CACHE_ENTRIES)
+    def load(path, key):
+        return func(path)
+
+    @functools.wraps(func)
+    def wrapper(path):
+        return load(path, cache_key(func, path)).copy()
+
+    return wrapper
+
+def disk_cache(func):
+    """
+    Cache the DataFrame a file-reading function returns, in memory and on disk.
+
+    The decorated function must take the file path as its only argument. The
+    cached copy is reused until the file's mtime or size changes, and keeps the
+    DataFrame's dtypes exactly. The on-disk tier is a pickle per file version;
+    the in-memory tier keeps recent results for long-running processes such as
+    the scheduler. Callers always receive their own copy.
+    """
+    @functools.lru_cache(maxsize=MEMORY_CACHE_ENTRIES)
+    def load(path, key):
+        cache_path = os.path.join(CACHE_DIR, f"{key}.pkl")
+
+        df = read_cache_entry(cache_path)
+        if df is not None:
+            logger.info(f"Using cached data for {path}")
+            return df
+
+        df = func(path)
+
+        try:
+            write_cache_entry(df, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache data for {path}: {e}")
+
+        return df
+
+    @functools.wraps(func)
+    def wrapper(path):
+        return load(path, cache_key(func, path)).copy()
+
+    return wrapper
+
+def frame_digest(df):
+    """
+    Hash a DataFrame's column names, dtypes, index and values.
+
+    Args:
+        df (DataFrame): Data to hash
+
+    Returns:
+        str: Hex digest that changes whenever the DataFrame's content changes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def content_cache(func):
+    """
+    Cache the result of a (key, df) -> (key, df) function on disk by content.
+
+    The result is reused whenever the same key arrives with identical data,
+    so unchanged inputs skip reprocessing on later runs. Entries also depend
+    on the defining module's mtime, so editing the code invalidates them.
+    Inputs that cannot be hashed are processed without caching.
+    """
+    source_mtime = os.stat(inspect.getsourcefile(func)).st_mtime_ns
+
+    @functools.wraps(func)
+    def wrapper(key, df):
+        try:
+            digest = frame_digest(df)
+        except TypeError as e:
+            logger.warning(f"Could not hash data for {key}, processing without cache: {e}")
+            return func(key, df)
+
+        raw_key = f"{func.__module__}.{func.__qualname__}|{source_mtime}|{key}|{digest}"
+        cache_path = os.path.join(CACHE_DIR, f"{hashlib.sha1(raw_key.encode()).hexdigest()}.pkl")
+
+        cached = read_cache_entry(cache_path)
+        if cached is not None:
+            logger.info(f"Using cached result for {key}")
+            return key, cached
+
+        result = func(key, df)
+
+        try:
+            write_cache_entry(result[1], cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache result for {key}: {e}")
+
+        return result
+
+    return wrapper
@@ -1,33 +1,71 @@
 import requests
-import json
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import gzip
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import json as pa_json
 import os
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Import configuration
 from config import (
     OPENAQ_API_KEY, AIRNOW_API_KEY, 
     OPENAQ_V3_ENDPOINT, AIRNOW_ENDPOINT,
     CITIES, PARAMETERS, 
-    LA_ZIP, RAW_DATA_DIR,
-    LOG_FILE, LOG_LEVEL
+    LA_ZIP, RAW_DATA_DIR
 )
 
+from log_setup import setup_logging
+
 # Set up logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Create data directory if it doesn't exist
 os.makedirs(RAW_DATA_DIR, exist_ok=True)
 
+# Timestamp format used in output filenames
+FILE_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Fixed values used by fetch_dummy_data
+DUMMY_COORDS = {
+    "Los Angeles": (34.05, -118.24),
+    "New York": (40.71, -74.01),
+    "London": (51.51, -0.13)
+}
+DUMMY_VALUES = {
+    "pm25": (35.0, "µg/m³"),
+    "o3": (45.0, "ppb")
+}
+
+# API timestamps stay the original ISO strings; left to inference, pyarrow would
+# parse them into naive timestamps and drop the UTC offset of date.local
+RAW_RECORD_SCHEMA = pa.schema([
+    pa.field('date', pa.struct([
+        pa.field('utc', pa.string()),
+        pa.field('local', pa.string())
+    ]))
+])
+
+# Concurrent API requests made by main
+FETCH_WORKERS = 8
+
+# Shared HTTP session so connections to the APIs are reused between requests
+SESSION = requests.Session()
+SESSION.headers.update({"Accept": "application/json"})
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
 def fetch_air_quality_data(city, parameter, limit=100):
     """
     Fetch air quality data from OpenAQ API v3 for a specific city and parameter.
@@ -48,13 +86,12 @@ def fetch_air_quality_data(city, parameter, limit=100):
     }
     
     headers = {
-        "X-API-Key": OPENAQ_API_KEY,
-        "Accept": "application/json"
+        "X-API-Key": OPENAQ_API_KEY
     }
     
     try:
         logger.info(f"Fetching {parameter} data for {city} using OpenAQ v3 API")
-        response = requests.get(OPENAQ_V3_ENDPOINT, params=params, headers=headers)
+        response = SESSION.get(OPENAQ_V3_ENDPOINT, params=params, headers=headers)
         
         # Log the response status for debugging
         logger.info(f"Response status code: {response.status_code}")
@@ -68,14 +105,37 @@ def fetch_air_quality_data(city, parameter, limit=100):
             logger.error(f"Response content: {e.response.text}")
         return None
 
-def save_data(data, city, parameter):
+def write_parquet(records, filename):
+    """
+    Write a list of API records to a Parquet file.
+    
+    Timestamps under date are stored as strings exactly as the API sent
+    them; every other field's type is inferred.
+    
+    Args:
+        records (list): Records as dictionaries, possibly nested
+        filename (str): Output Parquet path
+    """
+    # Parse the records as newline-delimited JSON straight into Arrow columns
+    ndjson = b"\n".join(orjson.dumps(record) for record in records)
+    table = pa_json.read_json(
+        io.BytesIO(ndjson),
+        parse_options=pa_json.ParseOptions(explicit_schema=RAW_RECORD_SCHEMA)
+    )
+    # Flatten nested objects into dotted columns (e.g. coordinates.latitude)
+    while any(pa.types.is_struct(field.type) for field in table.schema):
+        table = table.flatten()
+    pq.write_table(table, filename, compression='zstd')
+
+def save_data(data, city, parameter, timestamp=None):
     """
-    Save raw data to CSV and JSON files.
+    Save raw data to Parquet and compressed JSON files.
     
     Args:
         data (dict): API response data
         city (str): City name
         parameter (str): Pollutant parameter
+        timestamp (str): Batch timestamp used in filenames; defaults to now
     """
     # Handle different response structure in v3
     if not data:
@@ -92,19 +152,23 @@ def save_data(data, city, parameter):
         logger.warning(f"Unexpected data structure for {city} - {parameter}")
         return
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    json_filename = f"{RAW_DATA_DIR}/{city}_{parameter}_{timestamp}.json"
-    csv_filename = f"{RAW_DATA_DIR}/{city}_{parameter}_{timestamp}.csv"
+    if timestamp is None:
+        timestamp = datetime.now().strftime(FILE_TIMESTAMP_FORMAT)
+    json_filename = f"{RAW_DATA_DIR}/{city}_{parameter}_{timestamp}.json.gz"
+    parquet_filename = f"{RAW_DATA_DIR}/{city}_{parameter}_{timestamp}.parquet"
     
-    # Save raw JSON
-    with open(json_filename, 'w') as f:
-        json.dump(data, f)
+    # Save raw JSON, compressed
+    with gzip.open(json_filename, 'wb') as f:
+        f.write(orjson.dumps(data))
     
-    # Convert to DataFrame and save as CSV
+    # Convert to a columnar table and save as Parquet; records whose fields change
+    # type cannot be typed as columns, but the raw JSON above is still kept
     if results:
-        df = pd.json_normalize(results)
-        df.to_csv(csv_filename, index=False)
-        logger.info(f"Saved {len(results)} records to {csv_filename}")
+        try:
+            write_parquet(results, parquet_filename)
+            logger.info(f"Saved {len(results)} records to {parquet_filename}")
+        except pa.ArrowException as e:
+            logger.error(f"Could not convert {city} - {parameter} records to Parquet, raw JSON kept at {json_filename}: {e}")
     else:
         logger.warning(f"No results found for {city} - {parameter}")
 
@@ -124,7 +188,7 @@ def try_alternative_api():
     
     try:
         logger.info("Trying AirNow API")
-        response = requests.get(AIRNOW_ENDPOINT, params=params)
+        response = SESSION.get(AIRNOW_ENDPOINT, params=params)
         logger.info(f"AirNow response status: {response.status_code}")
         response.raise_for_status()
         return response.json()
@@ -134,61 +198,73 @@ def try_alternative_api():
             logger.error(f"AirNow response content: {e.response.text}")
         return None
 
-def fetch_dummy_data():
+def fetch_dummy_data(timestamp=None):
     """
     Create dummy data if all API methods fail.
     This ensures the pipeline can continue to subsequent phases for testing.
+    
+    Args:
+        timestamp (str): Batch timestamp used in filenames; defaults to now
     """
     logger.info("Creating dummy air quality data for testing")
     
+    # Every dummy record shares the same timestamps
+    now_utc = datetime.utcnow().isoformat()
+    now_local = datetime.now().isoformat()
+    if timestamp is None:
+        timestamp = datetime.now().strftime(FILE_TIMESTAMP_FORMAT)
+    
     for city in CITIES:
+        latitude, longitude = DUMMY_COORDS.get(city, DUMMY_COORDS["London"])
+        
         for parameter in PARAMETERS:
-            # Create a simple dummy data structure
-            dummy_data = {
-                "data": [
-                    {
-                        "location": f"{city} Downtown",
-                        "parameter": parameter,
-                        "value": 35.0 if parameter == "pm25" else (45.0 if parameter == "o3" else 25.0),
-                        "unit": "µg/m³" if parameter == "pm25" else "ppb",
-                        "coordinates": {
-                            "latitude": 34.05 if city == "Los Angeles" else (40.71 if city == "New York" else 51.51),
-                            "longitude": -118.24 if city == "Los Angeles" else (-74.01 if city == "New York" else -0.13)
-                        },
-                        "date": {
-                            "utc": datetime.utcnow().isoformat(),
-                            "local": datetime.now().isoformat()
-                        },
-                        "sourceName": "Dummy Data Generator"
-                    }
-                    for _ in range(10)  # Generate 10 records
-                ]
+            value, unit = DUMMY_VALUES.get(parameter, (25.0, "ppb"))
+            
+            # One record repeated 10 times
+            record = {
+                "location": f"{city} Downtown",
+                "parameter": parameter,
+                "value": value,
+                "unit": unit,
+                "coordinates": {
+                    "latitude": latitude,
+                    "longitude": longitude
+                },
+                "date": {
+                    "utc": now_utc,
+                    "local": now_local
+                },
+                "sourceName": "Dummy Data Generator"
             }
+            dummy_data = {"data": [record] * 10}
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             json_filename = f"{RAW_DATA_DIR}/{city}_{parameter}_{timestamp}_dummy.json"
-            csv_filename = f"{RAW_DATA_DIR}/{city}_{parameter}_{timestamp}_dummy.csv"
+            parquet_filename = f"{RAW_DATA_DIR}/{city}_{parameter}_{timestamp}_dummy.parquet"
             
             # Save dummy JSON
-            with open(json_filename, 'w') as f:
-                json.dump(dummy_data, f)
+            with open(json_filename, 'wb') as f:
+                f.write(orjson.dumps(dummy_data))
             
-            # Convert to DataFrame and save as CSV
-            df = pd.json_normalize(dummy_data['data'])
-            df.to_csv(csv_filename, index=False)
-            logger.info(f"Saved 10 dummy records to {csv_filename}")
+            # Save as Parquet
+            write_parquet(dummy_data['data'], parquet_filename)
+            logger.info(f"Saved 10 dummy records to {parquet_filename}")
 
 def main():
     """Main function to extract air quality data."""
     success = False
     
-    # First try OpenAQ v3
-    for city in CITIES:
-        for parameter in PARAMETERS:
-            data = fetch_air_quality_data(city, parameter)
-            if data:
-                save_data(data, city, parameter)
-                success = True
+    # One timestamp names every file written by this run
+    batch_timestamp = datetime.now().strftime(FILE_TIMESTAMP_FORMAT)
+    
+    # First try OpenAQ v3, fetching every city-parameter combination concurrently
+    tasks = [(city, parameter) for city in CITIES for parameter in PARAMETERS]
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        results = list(executor.map(lambda task: fetch_air_quality_data(*task), tasks))
+    
+    for (city, parameter), data in zip(tasks, results):
+        if data:
+            save_data(data, city, parameter, batch_timestamp)
+            success = True
     
     # If OpenAQ v3 didn't work, try AirNow API
     if not success:
@@ -199,10 +275,9 @@ def main():
             logger.info("Successfully retrieved data from AirNow API")
             
             # Save AirNow data
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            json_filename = f"{RAW_DATA_DIR}/airnow_{timestamp}.json"
-            with open(json_filename, 'w') as f:
-                json.dump(alternative_data, f)
+            json_filename = f"{RAW_DATA_DIR}/airnow_{batch_timestamp}.json"
+            with open(json_filename, 'wb') as f:
+                f.write(orjson.dumps(alternative_data))
             
             logger.info(f"Saved AirNow API data to {json_filename}")
             success = True
@@ -210,7 +285,7 @@ def main():
     # If both APIs failed, generate dummy data for testing
     if not success:
         logger.warning("All APIs failed. Generating dummy data for testing...")
-        fetch_dummy_data()
+        fetch_dummy_data(batch_timestamp)
         logger.info("Dummy data generation completed")
 
 if __name__ == "__main__":
@@ -1,59 +1,57 @@
 # src/load.py
 
 import os
+import io
 import logging
 import json
+import uuid
 import pandas as pd
-import psycopg2
-from psycopg2 import sql
 from psycopg2.extras import execute_values
-import glob
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import configuration
 from config import (
-    PROCESSED_DATA_DIR,
-    LOG_FILE,
-    LOG_LEVEL,
-    DB_NAME,
-    DB_USER,
-    DB_PASSWORD,
-    DB_HOST,
-    DB_PORT
+    PROCESSED_DATA_DIR
 )
 
+from log_setup import setup_logging
+from df_cache import disk_cache
+from db_pool import connect_to_db, release_connection, pooled_connection
+
 # Set up logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-def connect_to_db():
-    """
-    Connect to the PostgreSQL database.
-    
-    Returns:
-        connection: PostgreSQL database connection
-    """
-    try:
-        logger.info(f"Connecting to database {DB_NAME} on {DB_HOST}")
-        connection = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
-        logger.info("Database connection established")
-        return connection
-    except Exception as e:
-        logger.error(f"Error connecting to database: {e}")
-        return None
+# Column order of the tuples built by load_readings
+READING_COLUMNS = [
+    'location_id', 'timestamp', 'parameter', 'value', 'unit',
+    'aqi', 'aqi_category', 'health_recommendation', 'source_name'
+]
+
+# Default units by parameter, used when the processed data has no unit column
+UNIT_MAP = {
+    'pm25': 'µg/m³',
+    'o3': 'ppb',
+    'no2': 'ppb',
+    'so2': 'ppb',
+    'co': 'ppb'
+}
+
+# Low-cardinality text columns held as categoricals once loaded
+CATEGORY_COLUMNS = ['city', 'district', 'parameter', 'unit', 'aqi_category']
+
+# Coordinates keep float64 so they fit DECIMAL(9,6) without float32 rounding
+FULL_PRECISION_COLUMNS = ['latitude', 'longitude']
+
+# Rows per INSERT statement sent by execute_values
+EXECUTE_VALUES_PAGE_SIZE = 10000
+
+# Batches larger than this are streamed with COPY instead of INSERT
+COPY_THRESHOLD = 10000
+
+# Pooled connections used to COPY slices of a large batch in parallel
+COPY_WORKERS = 4
 
 def create_tables(connection):
     """
@@ -78,6 +76,46 @@ def create_tables(connection):
         logger.error(f"Error creating tables: {e}")
         connection.rollback()
 
+def downcast_dtypes(df):
+    """
+    Shrink the default int64/float64/object dtypes of a loaded DataFrame.
+    
+    Args:
+        df: DataFrame as read from disk
+        
+    Returns:
+        DataFrame: The same DataFrame with smaller dtypes
+    """
+    float_columns = df.select_dtypes('float64').columns.difference(FULL_PRECISION_COLUMNS)
+    for col in float_columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    
+    for col in df.select_dtypes('int64').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    
+    return df
+
+@disk_cache
+def read_processed_file(path):
+    """
+    Read a processed data file and shrink its dtypes.
+    
+    Args:
+        path: Path to a processed Parquet or CSV file
+        
+    Returns:
+        DataFrame: Processed data
+    """
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    return downcast_dtypes(df)
+
 def load_latest_processed_data():
     """
     Load the most recent processed data file.
@@ -86,20 +124,26 @@ def load_latest_processed_data():
         DataFrame: Combined processed data
     """
     try:
-        # Look for combined data files
-        combined_files = glob.glob(f"{PROCESSED_DATA_DIR}/combined_*.csv")
+        # Find the newest combined data file in Parquet or CSV format. Names embed
+        # the timestamp, and for the same timestamp .parquet sorts after .csv.
+        latest_entry = max(
+            (
+                entry for entry in os.scandir(PROCESSED_DATA_DIR)
+                if entry.name.startswith('combined_') and entry.name.endswith(('.parquet', '.csv'))
+            ),
+            key=lambda entry: entry.name,
+            default=None
+        )
         
-        if not combined_files:
+        if latest_entry is None:
             logger.warning("No combined processed data files found")
             return None
         
-        # Sort files by timestamp (newest first)
-        combined_files.sort(reverse=True)
-        latest_file = combined_files[0]
+        latest_file = latest_entry.path
         
         # Load the data
         logger.info(f"Loading processed data from {latest_file}")
-        df = pd.read_csv(latest_file)
+        df = read_processed_file(latest_file)
         logger.info(f"Loaded {len(df)} records from {latest_file}")
         
         return df
@@ -138,45 +182,31 @@ def load_locations(connection, df):
                     df[col] = 'Unknown'
         
         # Get unique locations
-        locations = df[location_columns].drop_duplicates()
+        locations = df[location_columns].drop_duplicates(subset=['city', 'district'])
         logger.info(f"Found {len(locations)} unique locations")
         
+        # Insert new locations and fetch the IDs of existing ones in one statement;
+        # the no-op update makes RETURNING include rows that already existed
+        rows = execute_values(
+            cursor,
+            """
+            INSERT INTO locations (city, district, latitude, longitude)
+            VALUES %s
+            ON CONFLICT (city, district) DO UPDATE SET city = EXCLUDED.city
+            RETURNING location_id, city, district, (xmax = 0) AS inserted
+            """,
+            list(locations.itertuples(index=False, name=None)),
+            fetch=True
+        )
+        
         # Dictionary to store location_id mapping
         location_map = {}
         
-        # For each location, insert if not exists and get the ID
-        for idx, location in locations.iterrows():
-            city = location['city']
-            district = location['district']
-            latitude = location['latitude']
-            longitude = location['longitude']
-            
-            # Check if location already exists
-            cursor.execute(
-                """
-                SELECT location_id FROM locations
-                WHERE city = %s AND district = %s
-                """,
-                (city, district)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                # Location exists, get the ID
-                location_id = result[0]
-                logger.info(f"Location '{city} - {district}' already exists with ID {location_id}")
-            else:
-                # Insert new location
-                cursor.execute(
-                    """
-                    INSERT INTO locations (city, district, latitude, longitude)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING location_id
-                    """,
-                    (city, district, latitude, longitude)
-                )
-                location_id = cursor.fetchone()[0]
+        for location_id, city, district, inserted in rows:
+            if inserted:
                 logger.info(f"Inserted new location '{city} - {district}' with ID {location_id}")
+            else:
+                logger.info(f"Location '{city} - {district}' already exists with ID {location_id}")
             
             # Store mapping of location to ID
             location_map[(city, district)] = location_id
@@ -190,6 +220,79 @@ def load_locations(connection, df):
         connection.rollback()
         return {}
 
+def copy_readings(cursor, readings_data, table):
+    """
+    Stream readings into a table with a single COPY statement.
+    
+    Args:
+        cursor: PostgreSQL database cursor
+        readings_data: List of reading tuples in READING_COLUMNS order
+        table: Name of the table to copy into
+    """
+    buffer = io.StringIO()
+    pd.DataFrame(readings_data, columns=READING_COLUMNS).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    
+    cursor.copy_expert(f"COPY {table} ({', '.join(READING_COLUMNS)}) FROM STDIN WITH CSV", buffer)
+    logger.info(f"Copied {len(readings_data)} readings into {table}")
+
+def copy_readings_parallel(connection, readings_data):
+    """
+    COPY disjoint slices of a large batch in parallel, then merge them once.
+    
+    COPY cannot skip conflicting rows, and temporary tables are private to one
+    session, so the slices are copied on separate pooled connections into a
+    shared unlogged staging table. The merge into readings runs on connection
+    without committing, so the batch still loads in the caller's transaction
+    and a failure leaves no partial batch behind. The staging table is always
+    dropped.
+    
+    Args:
+        connection: PostgreSQL database connection holding the load transaction
+        readings_data: List of reading tuples in READING_COLUMNS order
+    """
+    columns = ', '.join(READING_COLUMNS)
+    staging_table = f"readings_staging_{uuid.uuid4().hex}"
+    
+    with pooled_connection() as staging_connection:
+        staging_connection.cursor().execute(
+            f"CREATE UNLOGGED TABLE {staging_table} AS SELECT {columns} FROM readings WITH NO DATA"
+        )
+        staging_connection.commit()
+    
+    chunk_size = -(-len(readings_data) // COPY_WORKERS)
+    chunks = [readings_data[i:i + chunk_size] for i in range(0, len(readings_data), chunk_size)]
+    
+    def copy_chunk(chunk):
+        with pooled_connection() as chunk_connection:
+            try:
+                copy_readings(chunk_connection.cursor(), chunk, staging_table)
+                chunk_connection.commit()
+            except Exception:
+                chunk_connection.rollback()
+                raise
+    
+    try:
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            list(executor.map(copy_chunk, chunks))
+        
+        cursor = connection.cursor()
+        cursor.execute(
+            f"""
+            INSERT INTO readings ({columns})
+            SELECT {columns} FROM {staging_table}
+            ON CONFLICT (location_id, timestamp, parameter) DO NOTHING
+            """
+        )
+        cursor.execute(f"DROP TABLE {staging_table}")
+    except Exception:
+        # Release the load transaction's hold on the staging table before dropping it
+        connection.rollback()
+        with pooled_connection() as staging_connection:
+            staging_connection.cursor().execute(f"DROP TABLE IF EXISTS {staging_table}")
+            staging_connection.commit()
+        raise
+
 def load_readings(connection, df, location_map):
     """
     Load air quality readings into the readings table.
@@ -202,9 +305,6 @@ def load_readings(connection, df, location_map):
     try:
         cursor = connection.cursor()
         
-        # Prepare data for insertion
-        readings_data = []
-        
         # Check for required columns
         required_columns = ['city', 'parameter', 'value', 'aqi', 'aqi_category', 'health_recommendation']
         missing_columns = [col for col in required_columns if col not in df.columns]
@@ -242,15 +342,7 @@ def load_readings(connection, df, location_map):
         # Add a unit column if it doesn't exist
         if 'unit' not in df.columns:
             # Assign default units based on parameter
-            def get_unit(parameter):
-                if parameter.lower() == 'pm25':
-                    return 'µg/m³'
-                elif parameter.lower() in ['o3', 'no2', 'so2', 'co']:
-                    return 'ppb'
-                else:
-                    return 'unknown'
-            
-            df['unit'] = df['parameter'].apply(get_unit)
+            df['unit'] = df['parameter'].str.lower().map(UNIT_MAP).fillna('unknown')
         
         # Add source name if it doesn't exist
         if 'sourceName' not in df.columns and 'source_name' not in df.columns:
@@ -258,56 +350,58 @@ def load_readings(connection, df, location_map):
         elif 'sourceName' in df.columns:
             df.rename(columns={'sourceName': 'source_name'}, inplace=True)
         
+        # Keep only the last copy of each reading; retried extracts repeat rows
+        df = df.drop_duplicates(subset=['city', 'district', 'parameter', date_column], keep='last')
+        
+        # Resolve the location id of every row at once
+        location_ids = pd.Series(
+            df.set_index(['city', 'district']).index.map(location_map),
+            index=df.index
+        )
+        unmatched = location_ids.isna()
+        if unmatched.any():
+            unmatched_keys = df.loc[unmatched, ['city', 'district']].drop_duplicates()
+            for location_key in unmatched_keys.itertuples(index=False, name=None):
+                logger.warning(f"Location not found for {location_key}, skipping readings")
+            df = df[~unmatched]
+            location_ids = location_ids[~unmatched]
+        
+        # Parse timestamps in one pass, falling back to the current time. Values
+        # are normalized to UTC and stored naive in the TIMESTAMP column.
+        timestamps = (
+            pd.to_datetime(df[date_column], errors='coerce', utc=True)
+            .fillna(pd.Timestamp.now(tz='UTC'))
+            .dt.tz_localize(None)
+        )
+        
         # Prepare the data for bulk insertion
-        for idx, row in df.iterrows():
-            try:
-                # Get location_id from the mapping
-                location_key = (row['city'], row['district'])
-                location_id = location_map.get(location_key)
-                
-                if location_id is None:
-                    logger.warning(f"Location not found for {location_key}, skipping reading")
-                    continue
-                
-                # Parse timestamp
-                try:
-                    if pd.isna(row[date_column]):
-                        timestamp = datetime.now()
-                    elif isinstance(row[date_column], str):
-                        timestamp = pd.to_datetime(row[date_column])
-                    else:
-                        timestamp = row[date_column]
-                except:
-                    timestamp = datetime.now()
-                
-                # Prepare reading data
-                reading = (
-                    location_id,
-                    timestamp,
-                    row['parameter'],
-                    float(row['value']),
-                    row['unit'],
-                    int(row['aqi']) if not pd.isna(row['aqi']) else 0,
-                    row['aqi_category'],
-                    row['health_recommendation'],
-                    row['source_name']
-                )
-                
-                readings_data.append(reading)
-            except Exception as e:
-                logger.error(f"Error processing row {idx}: {e}")
+        cols = df[['parameter', 'value', 'unit', 'aqi', 'aqi_category', 'health_recommendation', 'source_name']].copy()
+        cols['value'] = cols['value'].astype(float)
+        cols['aqi'] = cols['aqi'].fillna(0).astype('int32')
+        
+        # Object arrays hold native Python values, which psycopg2 can adapt
+        readings_data = list(zip(
+            location_ids.astype(int).tolist(),
+            timestamps.tolist(),
+            *cols.to_numpy(dtype=object).T
+        ))
         
         # Bulk insert readings
         if readings_data:
-            execute_values(
-                cursor,
-                """
-                INSERT INTO readings 
-                (location_id, timestamp, parameter, value, unit, aqi, aqi_category, health_recommendation, source_name)
-                VALUES %s
-                """,
-                readings_data
-            )
+            if len(readings_data) > COPY_THRESHOLD:
+                copy_readings_parallel(connection, readings_data)
+            else:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO readings 
+                    (location_id, timestamp, parameter, value, unit, aqi, aqi_category, health_recommendation, source_name)
+                    VALUES %s
+                    ON CONFLICT (location_id, timestamp, parameter) DO NOTHING
+                    """,
+                    readings_data,
+                    page_size=EXECUTE_VALUES_PAGE_SIZE
+                )
             
             connection.commit()
             logger.info(f"Loaded {len(readings_data)} readings into database")
@@ -347,8 +441,8 @@ def main():
     except Exception as e:
         logger.error(f"Error in data loading process: {e}")
     finally:
-        connection.close()
-        logger.info("Database connection closed")
+        release_connection(connection)
+        logger.info("Database connection returned to pool")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,82 @@
+# src/log_setup.py
+
+import atexit
+import logging
+import multiprocessing
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+# Import configuration
+from config import LOG_FILE, LOG_LEVEL
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records written to the log file are batched until this many are buffered
+LOG_BUFFER_CAPACITY = 1024
+
+_listener = None
+
+def setup_logging():
+    """
+    Configure root logging to write through a background thread.
+
+    Records are put on a queue by the calling thread; a QueueListener hands
+    them to the console and to a MemoryHandler that batches writes to
+    LOG_FILE, flushing early on ERROR. The queue is a multiprocessing queue,
+    so worker processes forked from this one log through the same listener.
+    Only the first call has any effect, so every module can call it at
+    import time.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler.setFormatter(formatter)
+    buffered_file_handler = MemoryHandler(
+        capacity=LOG_BUFFER_CAPACITY,
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = multiprocessing.Queue(-1)
+    _listener = QueueListener(log_queue, buffered_file_handler, stream_handler)
+    _listener.start()
+
+    # The listener's handlers apply LOG_FORMAT; the queue only carries the message
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=getattr(logging, LOG_LEVEL), handlers=[queue_handler])
+    atexit.register(stop_logging)
+
+def flush_logging():
+    """
+    Write every record logged so far to its handlers, including the log file.
+    
+    The MemoryHandler only flushes on its own once LOG_BUFFER_CAPACITY
+    records or an ERROR arrive, so long-running callers such as the scheduler
+    call this after each unit of work. The listener is stopped to drain the
+    queue and then restarted; records logged meanwhile wait on the queue.
+    """
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.flush()
+    _listener.start()
+
+def stop_logging():
+    """Drain queued records and flush buffered output to the log file."""
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.flush()
+    _listener = None
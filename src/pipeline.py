@@ -1,9 +1,10 @@
 # src/pipeline.py
 
 import logging
+import signal
+import threading
 import time
-import schedule
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 import os
 
@@ -13,21 +14,12 @@ import transform
 import load
 
 # Import configuration
-from config import (
-    LOG_FILE,
-    LOG_LEVEL,
-    PIPELINE_INTERVAL_HOURS
-)
+from config import PIPELINE_INTERVAL_HOURS
+
+from log_setup import setup_logging, flush_logging
 
 # Set up logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 def run_pipeline():
@@ -61,27 +53,50 @@ def run_pipeline():
 def schedule_pipeline():
     """
     Schedule the pipeline to run at regular intervals.
+    
+    The scheduler sleeps on an Event until the next run is due, so it only
+    wakes when there is work to do. Ctrl-C stops it immediately: while
+    waiting it ends the wait, and during a run it interrupts the run.
     """
     logger.info(f"Scheduling pipeline to run every {PIPELINE_INTERVAL_HOURS} hours")
     
-    # Schedule the job
-    schedule.every(PIPELINE_INTERVAL_HOURS).hours.do(run_pipeline)
+    interval = PIPELINE_INTERVAL_HOURS * 3600
+    next_run = time.monotonic() + interval
+    logger.info(f"Next pipeline run scheduled for: {datetime.now() + timedelta(seconds=interval)}")
     
-    # Print next run time
-    next_run = schedule.next_run()
-    logger.info(f"Next pipeline run scheduled for: {next_run}")
+    # Set by SIGINT to end the wait early
+    stop_event = threading.Event()
     
-    # Run once immediately
-    logger.info("Running pipeline immediately for initial data population")
-    run_pipeline()
+    def wait_for_next_run():
+        # Only the wait uses the Event; elsewhere SIGINT raises KeyboardInterrupt as usual
+        signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+        try:
+            return not stop_event.wait(max(next_run - time.monotonic(), 0))
+        finally:
+            signal.signal(signal.SIGINT, signal.default_int_handler)
     
-    # Keep the script running
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-    except KeyboardInterrupt:
+        # Run once immediately
+        logger.info("Running pipeline immediately for initial data population")
+        run_pipeline()
+        flush_logging()
+        
+        # Keep the script running
+        while wait_for_next_run():
+            run_pipeline()
+            next_run += interval
+            
+            # Skip runs that were missed while the pipeline was busy
+            while next_run <= time.monotonic():
+                next_run += interval
+            logger.info(f"Next pipeline run scheduled for: {datetime.now() + timedelta(seconds=next_run - time.monotonic())}")
+            
+            # Write this run's buffered log records to the log file before sleeping
+            flush_logging()
+        
         logger.info("Pipeline scheduler stopped by user")
+    except KeyboardInterrupt:
+        logger.info("Pipeline scheduler stopped by user during a run")
     except Exception as e:
         logger.error(f"Pipeline scheduler stopped due to error: {e}")
 
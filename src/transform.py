@@ -3,32 +3,138 @@ import numpy as np
 import os
 import glob
 import logging
-import json
+import re
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import csv as pa_csv
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # Import configuration
 from config import (
     RAW_DATA_DIR, 
     PROCESSED_DATA_DIR,
-    LOG_FILE, 
-    LOG_LEVEL,
     PARAMETERS
 )
 
+from df_cache import memory_cache, content_cache
+from log_setup import setup_logging
+
 # Set up logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Create processed data directory if it doesn't exist
 os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
 
+# AQI breakpoints as (Clow, Chigh, Ilow, Ihigh) arrays, one entry per category
+# Units: PM2.5 in µg/m³, O3 and NO2 in ppb
+AQI_BREAKPOINTS = {
+    # PM2.5 breakpoints (24-hour average)
+    'pm25': (
+        np.array([0.0, 12.1, 35.5, 55.5, 150.5, 250.5]),
+        np.array([12.0, 35.4, 55.4, 150.4, 250.4, 500.4]),
+        np.array([0, 51, 101, 151, 201, 301]),
+        np.array([50, 100, 150, 200, 300, 500])
+    ),
+    # Ozone breakpoints (8-hour average)
+    'o3': (
+        np.array([0, 55, 71, 86, 106, 201]),
+        np.array([54, 70, 85, 105, 200, 604]),
+        np.array([0, 51, 101, 151, 201, 301]),
+        np.array([50, 100, 150, 200, 300, 500])
+    ),
+    # NO2 breakpoints (1-hour average)
+    'no2': (
+        np.array([0, 54, 101, 361, 650, 1250]),
+        np.array([53, 100, 360, 649, 1249, 2049]),
+        np.array([0, 51, 101, 151, 201, 301]),
+        np.array([50, 100, 150, 200, 300, 500])
+    )
+}
+
+# AQI categories; the first six line up with the breakpoint rows
+AQI_CATEGORIES = np.array([
+    "Good",
+    "Moderate",
+    "Unhealthy for Sensitive Groups",
+    "Unhealthy",
+    "Very Unhealthy",
+    "Hazardous",
+    "Hazardous (Beyond Index)",
+    "Good (Below Index)",
+    "Unknown"
+])
+BEYOND_INDEX = 6
+BELOW_INDEX = 7
+UNKNOWN_INDEX = 8
+
+# Health recommendations, aligned with AQI_CATEGORIES; below-index readings have none
+HEALTH_RECOMMENDATIONS = np.array([
+    "Air quality is satisfactory, and air pollution poses little or no risk.",
+    "Air quality is acceptable. However, there may be a risk for some people, particularly those who are unusually sensitive to air pollution.",
+    "Members of sensitive groups may experience health effects. The general public is less likely to be affected.",
+    "Some members of the general public may experience health effects; members of sensitive groups may experience more serious health effects.",
+    "Health alert: The risk of health effects is increased for everyone.",
+    "Health warning of emergency conditions: everyone is more likely to be affected.",
+    "Health warning of emergency conditions: everyone is at risk of serious health effects.",
+    None,
+    "Unable to determine health risk due to missing or invalid data."
+], dtype=object)
+
+# City coordinates
+CITY_COORDS = {
+    "Los Angeles": {"latitude": 34.0522, "longitude": -118.2437},
+    "New York": {"latitude": 40.7128, "longitude": -74.0060},
+    "London": {"latitude": 51.5074, "longitude": -0.1278}
+}
+
+# Per-city lookups for mapping a city column straight to coordinates
+CITY_LATITUDES = {city: coords["latitude"] for city, coords in CITY_COORDS.items()}
+CITY_LONGITUDES = {city: coords["longitude"] for city, coords in CITY_COORDS.items()}
+
+# Low-cardinality string columns stored as categoricals
+CATEGORY_COLUMNS = ['city', 'parameter', 'aqi_category', 'district', 'health_recommendation']
+
+# Raw filenames start with city_parameter_; multi-word cities may use an underscore
+RAW_FILENAME_PATTERN = re.compile(r'^(?P<city>Los[ _]Angeles|New[ _]York|[^_]+)_(?P<parameter>[^_]+)_')
+
+# Raw timestamp columns kept as the original ISO strings, as they are in raw Parquet files
+RAW_DATE_COLUMNS = ['date.utc', 'date.local']
+
+# Worker processes used to transform datasets in parallel
+TRANSFORM_WORKERS = os.cpu_count()
+
+# Threads used to read raw files concurrently
+READ_WORKERS = 8
+
+# Threads used to write processed files concurrently
+SAVE_WORKERS = 8
+
+@memory_cache
+def read_raw_file(file_path):
+    """
+    Read a raw Parquet or CSV data file.
+    
+    CSV files are parsed with pyarrow's multithreaded reader. Timestamp
+    columns are not inferred, so they keep their original precision and
+    format in the processed output.
+    
+    Args:
+        file_path (str): Path to the raw data file
+        
+    Returns:
+        DataFrame: Raw data
+    """
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path)
+    
+    convert_options = pa_csv.ConvertOptions(
+        column_types={column: pa.string() for column in RAW_DATE_COLUMNS},
+        strings_can_be_null=True
+    )
+    return pa_csv.read_csv(file_path, convert_options=convert_options).to_pandas()
+
 def load_latest_raw_data():
     """
     Load the most recent raw data files for each city and parameter.
@@ -38,377 +144,333 @@ def load_latest_raw_data():
     """
     logger.info("Loading latest raw data files")
     
-    # Get all CSV files in the raw data directory
-    csv_files = glob.glob(f"{RAW_DATA_DIR}/*.csv")
+    # Get all Parquet and CSV files in the raw data directory
+    data_files = glob.glob(f"{RAW_DATA_DIR}/*.parquet") + glob.glob(f"{RAW_DATA_DIR}/*.csv")
     
-    if not csv_files:
+    if not data_files:
         logger.error("No raw data files found. Run extract.py first.")
         return None
     
     # Sort by filename which contains timestamp
-    csv_files.sort(reverse=True)
+    data_files.sort(reverse=True)
     
-    # Dictionary to store the latest data for each city-parameter combination
-    latest_data = {}
-    
-    # Track which city-parameter combinations we've already found
-    found_combinations = set()
+    # Latest file path for each city-parameter combination
+    latest_files = {}
     
-    for file_path in csv_files:
+    for file_path in data_files:
         # Extract city and parameter from filename
-        filename = os.path.basename(file_path)
-        parts = filename.split('_')
-        
-        # Handle filenames with spaces in city names
-        if len(parts) >= 3:
-            if parts[0] == 'Los' and parts[1] == 'Angeles':
-                city = 'Los Angeles'
-                parameter = parts[2]
-            elif parts[0] == 'New' and parts[1] == 'York':
-                city = 'New York'
-                parameter = parts[2]
-            else:
-                city = parts[0]
-                parameter = parts[1]
+        match = RAW_FILENAME_PATTERN.match(os.path.basename(file_path))
+        if match:
+            city = match.group('city').replace('_', ' ')
+            parameter = match.group('parameter')
             
-            # Check if we already found this city-parameter combination
-            combination = f"{city}_{parameter}"
-            if combination not in found_combinations:
-                # Load the CSV file as a DataFrame
+            # Files are sorted newest first, so keep the first one found
+            latest_files.setdefault(f"{city}_{parameter}", file_path)
+    
+    # Dictionary to store the latest data for each city-parameter combination
+    latest_data = {}
+    
+    if latest_files:
+        with ThreadPoolExecutor(max_workers=min(READ_WORKERS, len(latest_files))) as executor:
+            futures = {
+                executor.submit(read_raw_file, file_path): combination
+                for combination, file_path in latest_files.items()
+            }
+            for future in as_completed(futures):
+                combination = futures[future]
+                file_path = latest_files[combination]
                 try:
-                    df = pd.read_csv(file_path)
+                    latest_data[combination] = future.result()
                     logger.info(f"Loaded data from {file_path}")
-                    latest_data[combination] = df
-                    found_combinations.add(combination)
                 except Exception as e:
                     logger.error(f"Error loading {file_path}: {e}")
+        
+        # Keep datasets in the same order as the files were found
+        latest_data = {key: latest_data[key] for key in latest_files if key in latest_data}
     
     logger.info(f"Loaded {len(latest_data)} city-parameter datasets")
     return latest_data
 
-def clean_data(data_dict):
+def calculate_aqi(concentration, parameter):
     """
-    Clean the raw data by handling missing values and standardizing column names.
+    Calculate Air Quality Index (AQI) from pollutant concentration.
     
     Args:
-        data_dict (dict): Dictionary with city_parameter as keys and DataFrames as values
+        concentration (float): Pollutant concentration
+        parameter (str): Pollutant parameter (pm25, o3, no2)
         
     Returns:
-        dict: Dictionary with cleaned DataFrames
+        tuple: (AQI value, AQI category)
     """
-    logger.info("Starting data cleaning process")
-    
-    if not data_dict:
-        logger.error("No data to clean")
-        return None
-    
-    cleaned_data = {}
-    
-    for key, df in data_dict.items():
-        logger.info(f"Cleaning dataset: {key}")
-        
-        # Make a copy to avoid modifying the original
-        df_clean = df.copy()
-        
-        # Standardize column names
-        df_clean.columns = [col.lower().replace('.', '_') for col in df_clean.columns]
-        
-        # Handle missing values
-        for col in df_clean.columns:
-            missing = df_clean[col].isna().sum()
-            if missing > 0:
-                logger.info(f"Found {missing} missing values in column {col}")
-                
-                # For numeric columns, fill with mean or median
-                if pd.api.types.is_numeric_dtype(df_clean[col]):
-                    median_value = df_clean[col].median()
-                    df_clean[col].fillna(median_value, inplace=True)
-                    logger.info(f"Filled missing values with median: {median_value}")
-                else:
-                    # For non-numeric columns, fill with most common value or "Unknown"
-                    if len(df_clean[col].dropna()) > 0:
-                        most_common = df_clean[col].value_counts().index[0]
-                        df_clean[col].fillna(most_common, inplace=True)
-                        logger.info(f"Filled missing values with most common value: {most_common}")
-                    else:
-                        df_clean[col].fillna("Unknown", inplace=True)
-                        logger.info("Filled missing values with 'Unknown'")
-        
-        # Ensure we have the necessary columns for later processing
-        required_columns = ['value', 'parameter']
-        missing_columns = [col for col in required_columns if col not in df_clean.columns]
-        
-        if missing_columns:
-            logger.warning(f"Dataset {key} is missing required columns: {missing_columns}")
-            
-            # Try to find alternative column names
-            for missing_col in missing_columns:
-                if missing_col == 'value':
-                    alternatives = ['average', 'mean', 'concentration', 'result']
-                    for alt in alternatives:
-                        if alt in df_clean.columns:
-                            df_clean['value'] = df_clean[alt]
-                            logger.info(f"Used '{alt}' column for 'value'")
-                            break
-                elif missing_col == 'parameter':
-                    # Extract parameter from the key (city_parameter)
-                    parameter = key.split('_')[-1]
-                    df_clean['parameter'] = parameter
-                    logger.info(f"Added 'parameter' column with value '{parameter}'")
-        
-        # Add or normalize city column
-        if 'city' not in df_clean.columns:
-            city = key.split('_')[0]
-            if city == 'Los' and 'Angeles' in key:
-                city = 'Los Angeles'
-            elif city == 'New' and 'York' in key:
-                city = 'New York'
-            df_clean['city'] = city
-            logger.info(f"Added 'city' column with value '{city}'")
-        
-        # Check for outliers in the 'value' column if it exists and is numeric
-        if 'value' in df_clean.columns and pd.api.types.is_numeric_dtype(df_clean['value']):
-            # Define outliers as values more than 3 standard deviations from the mean
-            mean = df_clean['value'].mean()
-            std = df_clean['value'].std()
-            
-            lower_bound = mean - 3 * std
-            upper_bound = mean + 3 * std
-            
-            # Count outliers
-            outliers = df_clean[(df_clean['value'] < lower_bound) | (df_clean['value'] > upper_bound)]
-            num_outliers = len(outliers)
-            
-            if num_outliers > 0:
-                logger.info(f"Found {num_outliers} outliers in 'value' column")
-                
-                # Replace outliers with upper/lower bounds
-                df_clean.loc[df_clean['value'] < lower_bound, 'value'] = lower_bound
-                df_clean.loc[df_clean['value'] > upper_bound, 'value'] = upper_bound
-                
-                logger.info(f"Capped outliers to range [{lower_bound:.2f}, {upper_bound:.2f}]")
-        
-        cleaned_data[key] = df_clean
-        logger.info(f"Cleaned dataset: {key}, rows: {len(df_clean)}, columns: {len(df_clean.columns)}")
+    parameter = parameter.lower()
+    if parameter not in AQI_BREAKPOINTS:
+        logger.warning(f"Unknown parameter: {parameter}, defaulting to PM2.5")
+        parameter = 'pm25'
     
-    return cleaned_data
+    aqi, category_idx = calculate_aqi_array([concentration], parameter)
+    return int(aqi[0]), str(AQI_CATEGORIES[category_idx[0]])
 
-def calculate_aqi(concentration, parameter):
+def calculate_aqi_array(concentrations, parameter):
     """
-    Calculate Air Quality Index (AQI) from pollutant concentration.
+    Calculate AQI values for many concentrations of one pollutant at once.
     
     Args:
-        concentration (float): Pollutant concentration
+        concentrations (array-like): Pollutant concentrations
         parameter (str): Pollutant parameter (pm25, o3, no2)
         
     Returns:
-        tuple: (AQI value, AQI category)
+        tuple: (AQI values as a float array, indices into AQI_CATEGORIES)
     """
-    # AQI breakpoints for different pollutants
-    # Format: (Clow, Chigh, Ilow, Ihigh)
-    # Units: PM2.5 in µg/m³, O3 and NO2 in ppb
-    
-    # PM2.5 breakpoints (24-hour average)
-    pm25_breakpoints = [
-        (0.0, 12.0, 0, 50),      # Good
-        (12.1, 35.4, 51, 100),   # Moderate
-        (35.5, 55.4, 101, 150),  # Unhealthy for Sensitive Groups
-        (55.5, 150.4, 151, 200), # Unhealthy
-        (150.5, 250.4, 201, 300), # Very Unhealthy
-        (250.5, 500.4, 301, 500)  # Hazardous
-    ]
-    
-    # Ozone breakpoints (8-hour average)
-    o3_breakpoints = [
-        (0, 54, 0, 50),         # Good
-        (55, 70, 51, 100),      # Moderate
-        (71, 85, 101, 150),     # Unhealthy for Sensitive Groups
-        (86, 105, 151, 200),    # Unhealthy
-        (106, 200, 201, 300),   # Very Unhealthy
-        (201, 604, 301, 500)    # Hazardous
-    ]
-    
-    # NO2 breakpoints (1-hour average)
-    no2_breakpoints = [
-        (0, 53, 0, 50),        # Good
-        (54, 100, 51, 100),    # Moderate
-        (101, 360, 101, 150),  # Unhealthy for Sensitive Groups
-        (361, 649, 151, 200),  # Unhealthy
-        (650, 1249, 201, 300), # Very Unhealthy
-        (1250, 2049, 301, 500) # Hazardous
-    ]
-    
-    # Select the appropriate breakpoints
-    if parameter.lower() == 'pm25':
-        breakpoints = pm25_breakpoints
-    elif parameter.lower() == 'o3':
-        breakpoints = o3_breakpoints
-    elif parameter.lower() == 'no2':
-        breakpoints = no2_breakpoints
-    else:
-        logger.warning(f"Unknown parameter: {parameter}, defaulting to PM2.5")
-        breakpoints = pm25_breakpoints
-    
-    # AQI categories
-    categories = [
-        "Good",
-        "Moderate",
-        "Unhealthy for Sensitive Groups",
-        "Unhealthy",
-        "Very Unhealthy",
-        "Hazardous"
-    ]
-    
-    # Calculate AQI
-    for i, (c_low, c_high, i_low, i_high) in enumerate(breakpoints):
-        if c_low <= concentration <= c_high:
-            aqi = ((i_high - i_low) / (c_high - c_low)) * (concentration - c_low) + i_low
-            category = categories[i]
-            return round(aqi), category
-    
-    # If concentration is higher than the highest breakpoint
-    if concentration > breakpoints[-1][1]:
-        return 500, "Hazardous (Beyond Index)"
-    
-    # If concentration is lower than the lowest breakpoint
-    return 0, "Good (Below Index)"
+    c_low, c_high, i_low, i_high = AQI_BREAKPOINTS[parameter]
+    concentrations = np.asarray(concentrations, dtype=float)
+    
+    # Locate the breakpoint segment whose upper bound is the first >= concentration
+    idx = np.searchsorted(c_high, concentrations, side='left')
+    segment = idx.clip(0, len(c_high) - 1)
+    in_range = (idx < len(c_high)) & (concentrations >= c_low[segment])
+    beyond = concentrations > c_high[-1]
+    
+    # Linear interpolation within the segment
+    aqi = (
+        (i_high[segment] - i_low[segment]) / (c_high[segment] - c_low[segment])
+        * (concentrations - c_low[segment]) + i_low[segment]
+    )
+    
+    # Values outside every segment (gaps, negatives, NaN) are below the index
+    aqi = np.where(in_range, np.rint(aqi), np.where(beyond, 500, 0))
+    category_idx = np.where(in_range, segment, np.where(beyond, BEYOND_INDEX, BELOW_INDEX))
+    
+    return aqi, category_idx
 
-def transform_to_aqi(cleaned_data):
+@content_cache
+def process_one(key, df):
     """
-    Transform cleaned pollutant data to AQI values and categories.
+    Clean a raw dataset, add AQI values and add geographical data in one pass.
     
     Args:
-        cleaned_data (dict): Dictionary with cleaned DataFrames
+        key (str): Dataset key (city_parameter)
+        df (DataFrame): Raw data, modified in place
         
     Returns:
-        dict: Dictionary with transformed DataFrames including AQI values
+        tuple: (key, fully processed DataFrame)
     """
-    logger.info("Transforming pollutant concentrations to AQI values")
-    
-    if not cleaned_data:
-        logger.error("No cleaned data to transform")
-        return None
+    logger.debug("Processing dataset: %s", key)
+    city, parameter = key.rsplit('_', 1)
     
-    transformed_data = {}
+    # Standardize column names
+    df.columns = [col.lower().replace('.', '_') for col in df.columns]
     
-    for key, df in cleaned_data.items():
-        logger.info(f"Transforming dataset: {key}")
+    # Handle missing values: numeric columns take their median, others their most common value
+    missing = df.isna().sum()
+    if missing.any():
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Missing values per column: %s", missing[missing > 0].to_dict())
         
-        # Make a copy to avoid modifying the original
-        df_transformed = df.copy()
+        medians = df.median(numeric_only=True)
+        df = df.fillna(medians)
         
-        # Check if we have the required columns
-        if 'value' not in df_transformed.columns or 'parameter' not in df_transformed.columns:
-            logger.warning(f"Dataset {key} missing required columns for AQI calculation")
-            transformed_data[key] = df_transformed
-            continue
+        other_columns = df.columns.difference(medians.index, sort=False)
+        if len(other_columns) > 0 and len(df) > 0:
+            modes = df[other_columns].mode().iloc[0]
+            df[other_columns] = df[other_columns].fillna(modes.fillna("Unknown"))
         
-        # Apply AQI calculation
-        aqi_values = []
-        aqi_categories = []
+        logger.info("Filled %d missing values in %d columns", missing.sum(), (missing > 0).sum())
+    
+    # Ensure we have the necessary columns for later processing
+    if 'value' not in df.columns:
+        logger.warning("Dataset %s is missing required column: value", key)
+        
+        # Try to find alternative column names
+        for alt in ['average', 'mean', 'concentration', 'result']:
+            if alt in df.columns:
+                df['value'] = df[alt]
+                logger.debug("Used '%s' column for 'value'", alt)
+                break
+    
+    if 'parameter' not in df.columns:
+        logger.warning("Dataset %s is missing required column: parameter", key)
+        df['parameter'] = parameter
+        logger.debug("Added 'parameter' column with value '%s'", parameter)
+    
+    if 'city' not in df.columns:
+        df['city'] = city
+        logger.debug("Added 'city' column with value '%s'", city)
+    
+    if 'value' in df.columns:
+        # Cap values more than 3 standard deviations from the mean
+        if pd.api.types.is_numeric_dtype(df['value']):
+            mean = df['value'].mean()
+            std = df['value'].std()
+            lower_bound = mean - 3 * std
+            upper_bound = mean + 3 * std
+            
+            num_outliers = ((df['value'] < lower_bound) | (df['value'] > upper_bound)).sum()
+            if num_outliers > 0:
+                df['value'] = df['value'].clip(lower=lower_bound, upper=upper_bound)
+                logger.info("Capped %d outliers in 'value' column to range [%.2f, %.2f]", num_outliers, lower_bound, upper_bound)
         
-        for idx, row in df_transformed.iterrows():
-            try:
-                parameter = row['parameter'].lower() if isinstance(row['parameter'], str) else 'pm25'
-                concentration = float(row['value'])
-                aqi, category = calculate_aqi(concentration, parameter)
-                aqi_values.append(aqi)
-                aqi_categories.append(category)
-            except Exception as e:
-                logger.error(f"Error calculating AQI for row {idx}: {e}")
-                aqi_values.append(None)
-                aqi_categories.append("Unknown")
+        # Apply AQI calculation per parameter; non-string parameters count as PM2.5
+        parameters = df['parameter'].str.lower().fillna('pm25')
+        concentrations = pd.to_numeric(df['value'], errors='coerce').to_numpy()
         
-        # Add AQI values and categories to the DataFrame
-        df_transformed['aqi'] = aqi_values
-        df_transformed['aqi_category'] = aqi_categories
+        aqi_values = np.full(len(df), np.nan)
+        category_idx = np.full(len(df), UNKNOWN_INDEX)
         
-        # Add health recommendations based on AQI category
-        health_recommendations = {
-            "Good": "Air quality is satisfactory, and air pollution poses little or no risk.",
-            "Moderate": "Air quality is acceptable. However, there may be a risk for some people, particularly those who are unusually sensitive to air pollution.",
-            "Unhealthy for Sensitive Groups": "Members of sensitive groups may experience health effects. The general public is less likely to be affected.",
-            "Unhealthy": "Some members of the general public may experience health effects; members of sensitive groups may experience more serious health effects.",
-            "Very Unhealthy": "Health alert: The risk of health effects is increased for everyone.",
-            "Hazardous": "Health warning of emergency conditions: everyone is more likely to be affected.",
-            "Hazardous (Beyond Index)": "Health warning of emergency conditions: everyone is at risk of serious health effects.",
-            "Unknown": "Unable to determine health risk due to missing or invalid data."
-        }
+        for parameter_name, positions in parameters.groupby(parameters, sort=False).indices.items():
+            if parameter_name not in AQI_BREAKPOINTS:
+                logger.warning("Unknown parameter: %s, defaulting to PM2.5", parameter_name)
+                parameter_name = 'pm25'
+            aqi_values[positions], category_idx[positions] = calculate_aqi_array(
+                concentrations[positions], parameter_name
+            )
         
-        df_transformed['health_recommendation'] = df_transformed['aqi_category'].map(health_recommendations)
+        # Values that are present but not numeric cannot be converted
+        invalid = np.isnan(concentrations) & df['value'].notna().to_numpy()
+        if invalid.any():
+            logger.error("Could not calculate AQI for %d rows with non-numeric values", invalid.sum())
+            aqi_values[invalid] = np.nan
+            category_idx[invalid] = UNKNOWN_INDEX
         
-        transformed_data[key] = df_transformed
-        logger.info(f"Transformed dataset: {key}, added AQI values and categories")
+        # Add AQI values (at most 500, so int16 suffices), categories and health recommendations
+        df['aqi'] = aqi_values if invalid.any() else aqi_values.astype(np.int16)
+        df['aqi_category'] = AQI_CATEGORIES[category_idx]
+        df['health_recommendation'] = HEALTH_RECOMMENDATIONS[category_idx]
+    else:
+        logger.warning("Dataset %s missing required columns for AQI calculation", key)
+    
+    # If we don't have coordinates, add them based on city
+    lowered = [col.lower() for col in df.columns]
+    has_lat = any('lat' in col for col in lowered)
+    has_lon = any('lon' in col for col in lowered)
+    
+    if not (has_lat and has_lon):
+        for column, lookup in (('latitude', CITY_LATITUDES), ('longitude', CITY_LONGITUDES)):
+            coords = df['city'].map(lookup)
+            if coords.notna().any():
+                # Cities without known coordinates keep any value they already had
+                df[column] = coords.fillna(df[column]) if column in df.columns else coords
+        logger.debug("Added coordinates based on city names")
+    
+    # Make sure we have standardized column names for coordinates
+    for col, lower in zip(list(df.columns), lowered):
+        if 'lat' in lower and col != 'latitude':
+            df['latitude'] = df[col]
+            logger.debug("Standardized '%s' to 'latitude'", col)
+        elif 'lon' in lower and col != 'longitude':
+            df['longitude'] = df[col]
+            logger.debug("Standardized '%s' to 'longitude'", col)
+    
+    # Add district/neighborhood information (dummy for now)
+    if 'district' not in df.columns:
+        df['district'] = "Downtown"  # Simplified for the example
+        logger.debug("Added placeholder district information")
+    
+    # Repeated labels are stored once per dataset rather than once per row
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    logger.info("Processed dataset: %s, rows: %d, columns: %d", key, len(df), len(df.columns))
+    
+    return key, df
+
+def write_json(df, filename):
+    """
+    Write a DataFrame to a JSON file as a list of records.
     
-    return transformed_data
+    Args:
+        df (DataFrame): Data to write
+        filename (str): Output file path
+    """
+    df.to_json(filename, orient='records', date_format='iso', indent=2)
 
-def add_geo_data(transformed_data):
+def combined_columns(frames):
     """
-    Add or standardize geographical data for mapping purposes.
+    Get the union of columns across DataFrames, in order of first appearance.
     
     Args:
-        transformed_data (dict): Dictionary with transformed DataFrames
+        frames (list): DataFrames that make up the combined dataset
         
     Returns:
-        dict: Dictionary with DataFrames including geographical data
+        list: Column names, ordered as pd.concat would order them
     """
-    logger.info("Adding geographical coordinates for mapping")
+    return list(dict.fromkeys(col for df in frames for col in df.columns))
+
+def write_combined_csv(frames, filename):
+    """
+    Append DataFrames to a single CSV file one at a time.
     
-    if not transformed_data:
-        logger.error("No transformed data to enhance")
-        return None
+    Args:
+        frames (list): DataFrames that make up the combined dataset
+        filename (str): Output file path
+    """
+    columns = combined_columns(frames)
+    with open(filename, 'w', newline='') as f:
+        for i, df in enumerate(frames):
+            df.reindex(columns=columns).to_csv(f, header=(i == 0), index=False)
+
+def write_combined_json(frames, filename):
+    """
+    Append DataFrames to a single JSON array of records one at a time.
     
-    geo_data = {}
+    Args:
+        frames (list): DataFrames that make up the combined dataset
+        filename (str): Output file path
+    """
+    columns = combined_columns(frames)
+    with open(filename, 'w') as f:
+        f.write('[\n')
+        first = True
+        for df in frames:
+            if df.empty:
+                continue
+            records = df.reindex(columns=columns).to_json(orient='records', date_format='iso', indent=2)
+            if not first:
+                f.write(',\n')
+            # Strip the enclosing brackets so the records join into one array
+            f.write(records[1:-1].strip('\n'))
+            first = False
+        f.write('\n]')
+
+def write_combined_parquet(frames, filename):
+    """
+    Append DataFrames to a single zstd-compressed Parquet file one at a time.
     
-    # City coordinates
-    city_coords = {
-        "Los Angeles": {"latitude": 34.0522, "longitude": -118.2437},
-        "New York": {"latitude": 40.7128, "longitude": -74.0060},
-        "London": {"latitude": 51.5074, "longitude": -0.1278}
-    }
+    Columns are widened to a type every frame fits; a column that is numeric
+    in one frame and text in another is written as strings.
     
-    for key, df in transformed_data.items():
-        logger.info(f"Adding geographical data to dataset: {key}")
-        
-        # Make a copy to avoid modifying the original
-        df_geo = df.copy()
-        
-        # Check if we already have coordinates
-        has_lat = any(col for col in df_geo.columns if 'lat' in col.lower())
-        has_lon = any(col for col in df_geo.columns if 'lon' in col.lower())
-        
-        # If we don't have coordinates, add them based on city
-        if not (has_lat and has_lon) and 'city' in df_geo.columns:
-            for city, coords in city_coords.items():
-                mask = df_geo['city'] == city
-                if mask.any():
-                    df_geo.loc[mask, 'latitude'] = coords['latitude']
-                    df_geo.loc[mask, 'longitude'] = coords['longitude']
-            
-            logger.info(f"Added coordinates based on city names")
-        
-        # Make sure we have standardized column names for coordinates
-        for col in df_geo.columns:
-            if 'lat' in col.lower() and col != 'latitude':
-                df_geo['latitude'] = df_geo[col]
-                logger.info(f"Standardized '{col}' to 'latitude'")
-            elif 'lon' in col.lower() and col != 'longitude':
-                df_geo['longitude'] = df_geo[col]
-                logger.info(f"Standardized '{col}' to 'longitude'")
-        
-        # Add district/neighborhood information (dummy for now)
-        if 'district' not in df_geo.columns:
-            df_geo['district'] = "Downtown"  # Simplified for the example
-            logger.info("Added placeholder district information")
-        
-        geo_data[key] = df_geo
-        logger.info(f"Added geographical data to dataset: {key}")
-    
-    return geo_data
+    Args:
+        frames (list): DataFrames that make up the combined dataset
+        filename (str): Output file path
+    """
+    fields = {}
+    for df in frames:
+        for field in pa.Schema.from_pandas(df, preserve_index=False).remove_metadata():
+            fields.setdefault(field.name, []).append(field)
+    
+    # Widen types shared across frames (e.g. int16 and float64 AQI) into one schema;
+    # columns whose types cannot be unified (e.g. numeric and text values) are written as strings
+    unified = []
+    for name, same_name in fields.items():
+        try:
+            unified.append(pa.unify_schemas([pa.schema([field]) for field in same_name], promote_options='permissive').field(0))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            logger.warning(f"Column {name} has incompatible types across datasets, writing it as string")
+            unified.append(pa.field(name, pa.string()))
+    schema = pa.schema(unified)
+    
+    with pq.ParquetWriter(filename, schema, compression='zstd') as writer:
+        for df in frames:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            columns = [
+                table.column(field.name) if field.name in table.column_names else pa.nulls(len(df), field.type)
+                for field in schema
+            ]
+            writer.write_table(pa.Table.from_arrays(columns, names=schema.names).cast(schema))
 
 def save_processed_data(processed_data):
     """
-    Save processed data to CSV and JSON files.
+    Save processed data to CSV, JSON and Parquet files.
     
     Args:
         processed_data (dict): Dictionary with fully processed DataFrames
@@ -421,35 +483,32 @@ def save_processed_data(processed_data):
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    # Save individual city-parameter files
-    for key, df in processed_data.items():
-        csv_filename = f"{PROCESSED_DATA_DIR}/{key}_{timestamp}.csv"
-        json_filename = f"{PROCESSED_DATA_DIR}/{key}_{timestamp}.json"
+    with ThreadPoolExecutor(max_workers=SAVE_WORKERS) as executor:
+        futures = {}
         
-        # Save as CSV
-        df.to_csv(csv_filename, index=False)
-        logger.info(f"Saved processed data to {csv_filename}")
+        # Save individual city-parameter files
+        for key, df in processed_data.items():
+            csv_filename = f"{PROCESSED_DATA_DIR}/{key}_{timestamp}.csv"
+            json_filename = f"{PROCESSED_DATA_DIR}/{key}_{timestamp}.json"
+            parquet_filename = f"{PROCESSED_DATA_DIR}/{key}_{timestamp}.parquet"
+            
+            futures[executor.submit(df.to_csv, csv_filename, index=False)] = csv_filename
+            futures[executor.submit(write_json, df, json_filename)] = json_filename
+            futures[executor.submit(df.to_parquet, parquet_filename, engine='pyarrow', compression='zstd', index=False)] = parquet_filename
+        
+        # Save combined dataset, streaming each frame rather than concatenating them
+        frames = list(processed_data.values())
+        combined_csv = f"{PROCESSED_DATA_DIR}/combined_{timestamp}.csv"
+        combined_json = f"{PROCESSED_DATA_DIR}/combined_{timestamp}.json"
+        combined_parquet = f"{PROCESSED_DATA_DIR}/combined_{timestamp}.parquet"
+        
+        futures[executor.submit(write_combined_csv, frames, combined_csv)] = combined_csv
+        futures[executor.submit(write_combined_json, frames, combined_json)] = combined_json
+        futures[executor.submit(write_combined_parquet, frames, combined_parquet)] = combined_parquet
         
-        # Save as JSON
-        df_json = df.to_dict(orient='records')
-        with open(json_filename, 'w') as f:
-            json.dump(df_json, f, indent=2)
-        logger.info(f"Saved processed data to {json_filename}")
-    
-    # Combine all data into a single dataset
-    combined_df = pd.concat(processed_data.values(), ignore_index=True)
-    
-    # Save combined dataset
-    combined_csv = f"{PROCESSED_DATA_DIR}/combined_{timestamp}.csv"
-    combined_json = f"{PROCESSED_DATA_DIR}/combined_{timestamp}.json"
-    
-    combined_df.to_csv(combined_csv, index=False)
-    logger.info(f"Saved combined processed data to {combined_csv}")
-    
-    combined_json_data = combined_df.to_dict(orient='records')
-    with open(combined_json, 'w') as f:
-        json.dump(combined_json_data, f, indent=2)
-    logger.info(f"Saved combined processed data to {combined_json}")
+        for future in as_completed(futures):
+            future.result()
+            logger.info(f"Saved processed data to {futures[future]}")
 
 def main():
     """Main function to orchestrate the data transformation process."""
@@ -461,22 +520,12 @@ def main():
         logger.error("Failed to load raw data. Exiting.")
         return
     
-    # Step 2: Clean the data
-    cleaned_data = clean_data(raw_data)
-    if not cleaned_data:
-        logger.error("Failed to clean data. Exiting.")
-        return
-    
-    # Step 3: Transform data to AQI values
-    transformed_data = transform_to_aqi(cleaned_data)
-    if not transformed_data:
-        logger.error("Failed to transform data. Exiting.")
-        return
+    # Steps 2-4: Clean, transform to AQI and add geographical data, one dataset per process
+    with ProcessPoolExecutor(max_workers=TRANSFORM_WORKERS) as executor:
+        processed_data = dict(executor.map(process_one, raw_data.keys(), raw_data.values()))
     
-    # Step 4: Add geographical data
-    processed_data = add_geo_data(transformed_data)
     if not processed_data:
-        logger.error("Failed to add geographical data. Exiting.")
+        logger.error("Failed to process data. Exiting.")
         return
     
     # Step 5: Save processed data
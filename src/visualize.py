@@ -1,28 +1,30 @@
 # src/visualize.py
 
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import os
 import logging
 import psycopg2
-from psycopg2 import sql
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import matplotlib.dates as mdates
+from matplotlib.collections import PatchCollection
+from matplotlib.patches import Patch, Rectangle
 
 # Import configuration
 from config import (
-    DB_NAME,
-    DB_USER,
-    DB_PASSWORD,
-    DB_HOST,
-    DB_PORT,
     LOG_FILE,
     LOG_LEVEL,
     VISUALIZATION_OUTPUT_DIR
 )
 
+from df_cache import CACHE_DIR, prune_cache
+from db_pool import connect_to_db, release_connection, read_sql_arrow
+
 # Set up logging
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
@@ -38,307 +40,549 @@ logger = logging.getLogger(__name__)
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 8)
 
+# Charts are viewed on a dashboard; 120 dpi keeps them legible at a fraction of the pixels
+CHART_DPI = 120
+
+# zlib level for PNG output; level 1 is much faster to write for a slightly larger file
+PNG_COMPRESS_LEVEL = 1
+
+# Chart file format, 'png' or 'svg'; SVG keeps axes and text as vectors and rasterizes the data
+VIZ_FORMAT = os.environ.get('VIZ_FORMAT', 'png').lower()
+if VIZ_FORMAT not in ('png', 'svg'):
+    logger.warning(f"Unsupported VIZ_FORMAT {VIZ_FORMAT!r}, using png")
+    VIZ_FORMAT = 'png'
+
+# Points drawn per city line; longer series are downsampled with LTTB
+TIME_SERIES_POINTS = 500
+
+# Parameters plotted as time series, with their output filenames
+TIME_SERIES_CHARTS = [
+    ('pm25', 'pm25_time_series'),
+    ('o3', 'o3_time_series'),
+    ('no2', 'no2_time_series')
+]
+TIME_SERIES_PARAMETERS = [parameter for parameter, _ in TIME_SERIES_CHARTS]
+
+# AQI categories in order of severity, with the color used for each in charts
+AQI_CATEGORIES = [
+    'Good',
+    'Moderate',
+    'Unhealthy for Sensitive Groups',
+    'Unhealthy',
+    'Very Unhealthy',
+    'Hazardous'
+]
+AQI_COLORS = ['green', 'yellow', 'orange', 'red', 'purple', 'maroon']
+
+# AQI range shaded for each category, in AQI_CATEGORIES order
+AQI_RANGES = [(0, 50), (51, 100), (101, 150), (151, 200), (201, 300), (301, 500)]
+
+# Legend entries for the AQI bands; proxy artists can be shared by every legend
+AQI_BAND_HANDLES = [
+    Patch(color=color, alpha=0.2, label=category)
+    for category, color in zip(AQI_CATEGORIES, AQI_COLORS)
+]
+
+# Worker processes used to render charts in parallel
+CHART_WORKERS = 4
+
+# Figure reused by the single-axes charts rendered in this process
+_shared_ax = None
+
 # Create visualization output directory if it doesn't exist
 os.makedirs(VISUALIZATION_OUTPUT_DIR, exist_ok=True)
 
-def connect_to_db():
+def fetch_latest_timestamp(connection):
     """
-    Connect to the PostgreSQL database.
+    Get the timestamp of the newest reading.
     
-    Returns:
+    Args:
         connection: PostgreSQL database connection
+        
+    Returns:
+        Timestamp: Newest reading time, or None if unavailable
     """
     try:
-        logger.info(f"Connecting to database {DB_NAME} on {DB_HOST}")
-        connection = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
-        logger.info("Database connection established")
-        return connection
+        cursor = connection.cursor()
+        cursor.execute("SELECT MAX(timestamp) FROM readings")
+        latest = cursor.fetchone()[0]
+        cursor.close()
+        return pd.Timestamp(latest) if latest is not None else None
     except Exception as e:
-        logger.error(f"Error connecting to database: {e}")
+        logger.error(f"Error retrieving latest reading time from database: {e}")
         return None
 
-def get_latest_readings(connection, days=7):
+def cached_query(name, cache_key, fetch, index=None):
+    """
+    Return a query result from the Feather snapshot cache, fetching it on a miss.
+    
+    Args:
+        name: Name of the query, used in the cache filename
+        cache_key: String identifying the data version, or None to bypass the cache
+        fetch: Function that runs the query and returns a DataFrame
+        index: Column to restore as the index after reading from the cache
+        
+    Returns:
+        DataFrame: Query result
+    """
+    if cache_key is None:
+        return fetch()
+    
+    cache_path = os.path.join(CACHE_DIR, f"viz_{name}_{cache_key}.feather")
+    
+    if os.path.exists(cache_path):
+        logger.info(f"Using cached {name} data")
+        df = pd.read_feather(cache_path)
+        return df.set_index(index) if index else df
+    
+    df = fetch()
+    
+    if not df.empty:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            (df.reset_index() if index else df).to_feather(cache_path)
+            prune_cache()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not cache {name} data: {e}")
+    
+    return df
+
+def fetch_timeseries(connection, days=7, parameters=TIME_SERIES_PARAMETERS):
     """
-    Get the latest air quality readings from the database.
+    Get hourly average AQI by city for the given parameters.
     
     Args:
         connection: PostgreSQL database connection
         days: Number of days of data to retrieve
+        parameters: Air quality parameters to include
         
     Returns:
-        DataFrame: Latest air quality readings
+        DataFrame: timestamp, city, parameter and aqi, one row per hour
     """
     try:
         # Calculate start date for filtering
         start_date = datetime.now() - timedelta(days=days)
         
-        # SQL query to join readings with locations
         query = """
         SELECT 
-            r.reading_id,
-            r.timestamp,
-            r.parameter,
-            r.value,
-            r.unit,
-            r.aqi,
-            r.aqi_category,
-            r.health_recommendation,
+            date_trunc('hour', r.timestamp) AS timestamp,
             l.city,
-            l.district,
-            l.latitude,
-            l.longitude
+            r.parameter,
+            AVG(r.aqi) AS aqi
         FROM readings r
         JOIN locations l ON r.location_id = l.location_id
         WHERE r.timestamp >= %s
-        ORDER BY r.timestamp DESC
+          AND r.parameter = ANY(%s)
+        GROUP BY 1, 2, 3
+        ORDER BY 1
         """
         
-        # Execute query
-        df = pd.read_sql_query(query, connection, params=(start_date,))
+        df = read_sql_arrow(connection, query, (start_date, list(parameters)))
+        
+        # Repeated labels become integer codes and AQI averages fit in float32
+        df = df.astype({'city': 'category', 'parameter': 'category', 'aqi': 'float32'})
         
-        logger.info(f"Retrieved {len(df)} readings from the past {days} days")
+        # Parse timestamps once here so the charts can use them directly
+        df['timestamp'] = pd.to_datetime(df['timestamp']).astype('datetime64[ns]')
+        
+        logger.info(f"Retrieved {len(df)} hourly AQI averages from the past {days} days")
         return df
     except Exception as e:
-        logger.error(f"Error retrieving data from database: {e}")
-        return pd.DataFrame()
+        logger.error(f"Error retrieving time series data from database: {e}")
+        return pd.DataFrame(columns=['timestamp', 'city', 'parameter', 'aqi'])
 
-def create_time_series_chart(df, parameter, filename):
+def fetch_city_param_means(connection, days=7):
     """
-    Create a time series chart of AQI values by city.
+    Get the average AQI for each city and parameter.
     
     Args:
-        df: DataFrame with air quality readings
-        parameter: Air quality parameter to visualize (pm25, o3, no2)
-        filename: Output filename
+        connection: PostgreSQL database connection
+        days: Number of days of data to average over
+        
+    Returns:
+        DataFrame: Average AQI with cities as the index and parameters as columns
     """
     try:
-        # Filter data for the specified parameter
-        param_df = df[df['parameter'] == parameter].copy()
+        start_date = datetime.now() - timedelta(days=days)
         
-        if param_df.empty:
-            logger.warning(f"No data available for parameter: {parameter}")
-            return
+        query = """
+        SELECT 
+            l.city,
+            r.parameter,
+            AVG(r.aqi) AS aqi
+        FROM readings r
+        JOIN locations l ON r.location_id = l.location_id
+        WHERE r.timestamp >= %s
+        GROUP BY l.city, r.parameter
+        """
         
-        # Ensure timestamp is datetime format
-        param_df['timestamp'] = pd.to_datetime(param_df['timestamp'])
+        df = read_sql_arrow(connection, query, (start_date,))
+        df = df.astype({'city': 'category', 'parameter': 'category'})
         
-        # Create figure
-        plt.figure(figsize=(14, 8))
+        # Scatter each pair's average into a city x parameter grid by category code
+        cities = df['city'].cat
+        parameters = df['parameter'].cat
+        city_codes = cities.codes.to_numpy()
+        param_codes = parameters.codes.to_numpy()
+        known = (city_codes >= 0) & (param_codes >= 0)
         
-        # Plot each city
-        for city in param_df['city'].unique():
-            city_data = param_df[param_df['city'] == city]
-            plt.plot(city_data['timestamp'], city_data['aqi'], marker='o', linestyle='-', label=city)
+        grid = np.full((len(cities.categories), len(parameters.categories)), np.nan, dtype=np.float32)
+        grid[city_codes[known], param_codes[known]] = df['aqi'].to_numpy(np.float32)[known]
         
-        # Add AQI category background colors
-        plt.axhspan(0, 50, alpha=0.2, color='green', label='Good')
-        plt.axhspan(51, 100, alpha=0.2, color='yellow', label='Moderate')
-        plt.axhspan(101, 150, alpha=0.2, color='orange', label='Unhealthy for Sensitive Groups')
-        plt.axhspan(151, 200, alpha=0.2, color='red', label='Unhealthy')
-        plt.axhspan(201, 300, alpha=0.2, color='purple', label='Very Unhealthy')
-        plt.axhspan(301, 500, alpha=0.2, color='maroon', label='Hazardous')
+        logger.info(f"Retrieved average AQI for {len(df)} city-parameter pairs")
+        return pd.DataFrame(
+            grid,
+            index=pd.Index(cities.categories, name='city'),
+            columns=pd.Index(parameters.categories, name='parameter')
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving average AQI from database: {e}")
+        return pd.DataFrame()
+
+def fetch_category_counts(connection, days=7):
+    """
+    Get the number of readings in each AQI category.
+    
+    Args:
+        connection: PostgreSQL database connection
+        days: Number of days of data to count
         
-        # Set labels and title
-        plt.xlabel('Date', fontsize=12)
-        plt.ylabel('Air Quality Index (AQI)', fontsize=12)
-        plt.title(f'AQI Trend for {parameter.upper()} by City', fontsize=14)
+    Returns:
+        Series: Reading counts indexed by categorical AQI category
+    """
+    try:
+        start_date = datetime.now() - timedelta(days=days)
         
-        # Format x-axis dates
-        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        plt.gca().xaxis.set_major_locator(mdates.DayLocator())
-        plt.gcf().autofmt_xdate()
+        query = """
+        SELECT 
+            r.aqi_category,
+            COUNT(*) AS count
+        FROM readings r
+        WHERE r.timestamp >= %s
+        GROUP BY r.aqi_category
+        """
         
-        # Add grid and legend
-        plt.grid(True, alpha=0.3)
-        plt.legend(loc='best')
+        df = read_sql_arrow(connection, query, (start_date,))
         
-        # Add explanatory text
-        plt.figtext(0.02, 0.02, f'Data as of {datetime.now().strftime("%Y-%m-%d %H:%M")}', fontsize=8)
+        # Categories outside AQI_CATEGORIES (such as Unknown) get code -1
+        df['aqi_category'] = pd.Categorical(df['aqi_category'], categories=AQI_CATEGORIES, ordered=True)
         
-        # Save figure
-        output_path = os.path.join(VISUALIZATION_OUTPUT_DIR, f'{filename}.png')
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        logger.info(f"Retrieved reading counts for {len(df)} AQI categories")
+        return df.set_index('aqi_category')['count']
+    except Exception as e:
+        logger.error(f"Error retrieving AQI category counts from database: {e}")
+        return pd.Series(dtype='int64')
+
+def lttb(x, y, n_out):
+    """
+    Downsample a series with the Largest-Triangle-Three-Buckets algorithm.
+    
+    The first and last points are kept, and from each of the n_out - 2
+    buckets in between, the point forming the largest triangle with the
+    previously selected point and the next bucket's average is kept, which
+    preserves the visual shape of the line.
+    
+    Args:
+        x: Sorted x values (numeric)
+        y: y values
+        n_out: Number of points to keep
+        
+    Returns:
+        tuple: (downsampled x, downsampled y)
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    
+    x_f = np.asarray(x, dtype=np.float64)
+    y_f = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x_f[end:next_end].mean()
+        avg_y = y_f[end:next_end].mean()
+        
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs(
+            (x_f[previous] - avg_x) * (y_f[start:end] - y_f[previous])
+            - (x_f[previous] - x_f[start:end]) * (avg_y - y_f[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    
+    return x[selected], y[selected]
+
+def save_figure(fig, filename):
+    """
+    Save a figure to the visualization output directory in VIZ_FORMAT.
+    
+    Figures lay out their own margins with subplots_adjust, so no tight
+    bounding box pass is needed before writing.
+    
+    Args:
+        fig: Figure to save
+        filename: Output filename, without extension
         
-        logger.info(f"Created time series chart for {parameter} at {output_path}")
+    Returns:
+        str: Path of the written file
+    """
+    output_path = os.path.join(VISUALIZATION_OUTPUT_DIR, f'{filename}.{VIZ_FORMAT}')
+    
+    if VIZ_FORMAT == 'svg':
+        # Lines, bars and meshes are embedded as images; axes and text stay vector
+        for ax in fig.axes:
+            for artist in [*ax.get_lines(), *ax.patches, *ax.collections]:
+                artist.set_rasterized(True)
+        fig.savefig(output_path, dpi=CHART_DPI)
+    else:
+        fig.savefig(output_path, dpi=CHART_DPI, pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
+    
+    return output_path
+
+def reset_axes(ax, figsize):
+    """
+    Clear a shared chart so the next one can be drawn on the same figure.
+    
+    Removes everything the previous chart added, including extra axes such
+    as a heatmap colorbar and figure-level text, and resizes the figure.
+    
+    Args:
+        ax: Axes to reuse
+        figsize: New (width, height) of the figure in inches
+    """
+    fig = ax.figure
+    for other in fig.axes:
+        if other is not ax:
+            other.remove()
+    for text in list(fig.texts):
+        text.remove()
+    ax.clear()
+    
+    # clear() keeps state the heatmap changed outside the plotted artists
+    for spine in ax.spines.values():
+        spine.set_visible(True)
+    fig.set_size_inches(figsize)
+
+def add_aqi_bands(ax):
+    """
+    Shade the AQI category ranges behind a chart.
+    
+    All bands are drawn as one collection spanning the full width of the
+    axes, and are kept out of the automatic legend; use AQI_BAND_HANDLES
+    to list them.
+    
+    Args:
+        ax: Axes to draw on
+    """
+    bands = PatchCollection(
+        [Rectangle((0, low), 1, high - low) for low, high in AQI_RANGES],
+        facecolors=AQI_COLORS,
+        edgecolors=AQI_COLORS,
+        alpha=0.2,
+        transform=ax.get_yaxis_transform()
+    )
+    ax.add_collection(bands)
+
+def create_time_series_charts(df, charts):
+    """
+    Create time series charts of AQI values by city, one per parameter.
+    
+    The data is walked once, grouped by parameter and city, and each line is
+    drawn straight onto its parameter's figure.
+    
+    Args:
+        df: DataFrame with hourly AQI by city and parameter, from fetch_timeseries
+        charts: List of (parameter, output filename) pairs
+    """
+    axes = {}
+    try:
+        wanted = dict(charts)
+        
+        # Plot each city, walking the frame once in time order
+        df = df.sort_values('timestamp', kind='stable')
+        for (parameter, city), city_data in df.groupby(['parameter', 'city'], sort=False, observed=True):
+            if parameter not in wanted:
+                continue
+            if parameter not in axes:
+                axes[parameter] = plt.subplots(figsize=(14, 8))[1]
+            
+            # Keep at most TIME_SERIES_POINTS visually representative points per line
+            timestamps, aqi = lttb(
+                city_data['timestamp'].to_numpy().astype('int64'),
+                city_data['aqi'].to_numpy(),
+                TIME_SERIES_POINTS
+            )
+            line, = axes[parameter].plot(pd.to_datetime(timestamps), aqi, linestyle='-', label=str(city))
+            line.set_rasterized(True)
+        
+        for parameter, filename in charts:
+            if parameter not in axes:
+                logger.warning(f"No data available for parameter: {parameter}")
+                continue
+            
+            ax = axes[parameter]
+            fig = ax.figure
+            
+            # Add AQI category background colors
+            add_aqi_bands(ax)
+            
+            # Set labels and title
+            ax.set_xlabel('Date', fontsize=12)
+            ax.set_ylabel('Air Quality Index (AQI)', fontsize=12)
+            ax.set_title(f'AQI Trend for {parameter.upper()} by City', fontsize=14)
+            
+            # Format x-axis dates; the rotation is fixed, so no pass is needed to measure labels
+            locator = mdates.DayLocator()
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+            ax.tick_params(axis='x', rotation=30)
+            plt.setp(ax.get_xticklabels(), ha='right')
+            
+            # Add grid and legend
+            ax.grid(True, alpha=0.3)
+            ax.legend(handles=list(ax.get_lines()) + AQI_BAND_HANDLES, loc='best')
+            
+            # Add explanatory text
+            fig.text(0.02, 0.02, f'Data as of {datetime.now().strftime("%Y-%m-%d %H:%M")}', fontsize=8)
+            
+            # Save figure
+            fig.subplots_adjust(left=0.07, right=0.97, top=0.94, bottom=0.12)
+            output_path = save_figure(fig, filename)
+            plt.close(fig)
+            
+            logger.info(f"Created time series chart for {parameter} at {output_path}")
     except Exception as e:
-        logger.error(f"Error creating time series chart: {e}")
+        logger.error(f"Error creating time series charts: {e}")
+    finally:
+        for ax in axes.values():
+            plt.close(ax.figure)
 
-def create_aqi_comparison_chart(df, filename):
+def create_aqi_comparison_chart(pivot_df, filename, ax):
     """
     Create a bar chart comparing the average AQI by city and parameter.
     
     Args:
-        df: DataFrame with air quality readings
+        pivot_df: Average AQI by city and parameter, from fetch_city_param_means
         filename: Output filename
+        ax: Shared axes to draw on
     """
     try:
-        # Group data by city and parameter to calculate average AQI
-        grouped_df = df.groupby(['city', 'parameter'])['aqi'].mean().reset_index()
-        
-        if grouped_df.empty:
+        if pivot_df.empty:
             logger.warning("No data available for AQI comparison chart")
             return
         
-        # Pivot data for plotting
-        pivot_df = pd.pivot_table(
-            grouped_df,
-            values='aqi',
-            index='city',
-            columns='parameter',
-            aggfunc='mean'
-        ).reset_index()
-        
-        # Create figure
-        plt.figure(figsize=(12, 8))
-        
-        # Set width of bars
-        bar_width = 0.25
-        index = np.arange(len(pivot_df['city']))
-        
-        # Plot bars for each parameter
-        param_columns = [col for col in pivot_df.columns if col != 'city']
-        for i, param in enumerate(param_columns):
-            plt.bar(
-                index + i * bar_width,
-                pivot_df[param],
-                bar_width,
-                label=param.upper()
-            )
+        # Clear the shared figure
+        reset_axes(ax, (12, 8))
+        fig = ax.figure
         
-        # Set labels and title
-        plt.xlabel('City', fontsize=12)
-        plt.ylabel('Average Air Quality Index (AQI)', fontsize=12)
-        plt.title('Average AQI by City and Pollutant', fontsize=14)
+        # Plot one group of bars per city, one bar per parameter
+        pivot_df.fillna(0).rename(columns=str.upper).plot.bar(ax=ax, width=0.8, rot=0)
         
-        # Set x-axis ticks
-        plt.xticks(index + bar_width, pivot_df['city'])
+        # Set labels and title
+        ax.set_xlabel('City', fontsize=12)
+        ax.set_ylabel('Average Air Quality Index (AQI)', fontsize=12)
+        ax.set_title('Average AQI by City and Pollutant', fontsize=14)
         
         # Add grid and legend
-        plt.grid(True, alpha=0.3, axis='y')
-        plt.legend(loc='best')
+        ax.grid(True, alpha=0.3, axis='y')
+        ax.legend(loc='best')
         
         # Add AQI level reference lines
-        plt.axhline(y=50, color='green', linestyle='--', alpha=0.5, label='Good threshold')
-        plt.axhline(y=100, color='yellow', linestyle='--', alpha=0.5, label='Moderate threshold')
-        plt.axhline(y=150, color='orange', linestyle='--', alpha=0.5, label='Unhealthy for Sensitive Groups threshold')
+        ax.axhline(y=50, color='green', linestyle='--', alpha=0.5, label='Good threshold')
+        ax.axhline(y=100, color='yellow', linestyle='--', alpha=0.5, label='Moderate threshold')
+        ax.axhline(y=150, color='orange', linestyle='--', alpha=0.5, label='Unhealthy for Sensitive Groups threshold')
         
         # Add explanatory text
-        plt.figtext(0.02, 0.02, f'Data as of {datetime.now().strftime("%Y-%m-%d %H:%M")}', fontsize=8)
+        fig.text(0.02, 0.02, f'Data as of {datetime.now().strftime("%Y-%m-%d %H:%M")}', fontsize=8)
         
         # Save figure
-        output_path = os.path.join(VISUALIZATION_OUTPUT_DIR, f'{filename}.png')
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.subplots_adjust(left=0.08, right=0.97, top=0.94, bottom=0.11)
+        output_path = save_figure(fig, filename)
         
         logger.info(f"Created AQI comparison chart at {output_path}")
     except Exception as e:
         logger.error(f"Error creating AQI comparison chart: {e}")
 
-def create_aqi_distribution_chart(df, filename):
+def create_aqi_distribution_chart(counts, filename, ax):
     """
     Create a histogram showing the distribution of AQI values by category.
     
     Args:
-        df: DataFrame with air quality readings
+        counts: Reading counts by AQI category, from fetch_category_counts
         filename: Output filename
+        ax: Shared axes to draw on
     """
     try:
         # Ensure we have AQI category data
-        if 'aqi_category' not in df.columns or df.empty:
+        if counts.empty:
             logger.warning("No AQI category data available for distribution chart")
             return
         
-        # Create figure
-        plt.figure(figsize=(14, 8))
-        
-        # Define category order and colors
-        categories = [
-            'Good',
-            'Moderate',
-            'Unhealthy for Sensitive Groups',
-            'Unhealthy',
-            'Very Unhealthy',
-            'Hazardous'
-        ]
-        colors = ['green', 'yellow', 'orange', 'red', 'purple', 'maroon']
-        
-        # Count occurrences of each category
-        category_counts = df['aqi_category'].value_counts().reindex(categories, fill_value=0)
+        # Clear the shared figure
+        reset_axes(ax, (14, 8))
+        fig = ax.figure
         
-        # Create bar chart
-        bars = plt.bar(
-            category_counts.index,
-            category_counts.values,
-            color=colors[:len(category_counts)]
-        )
+        # Sum counts per category code in one pass; code -1 is outside the chart
+        codes = np.asarray(counts.index.codes)
+        charted = codes >= 0
+        category_counts = np.bincount(
+            codes[charted],
+            weights=counts.to_numpy()[charted],
+            minlength=len(AQI_CATEGORIES)
+        ).astype(np.int64)
         
-        # Add count labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(
-                bar.get_x() + bar.get_width()/2.,
-                height + 0.5,
-                f'{int(height)}',
-                ha='center',
-                va='bottom'
-            )
+        # Create bar chart with count labels on top of the bars
+        bars = ax.bar(AQI_CATEGORIES, category_counts, color=AQI_COLORS)
+        ax.bar_label(bars, fmt='%d', padding=3)
         
         # Set labels and title
-        plt.xlabel('AQI Category', fontsize=12)
-        plt.ylabel('Number of Readings', fontsize=12)
-        plt.title('Distribution of Air Quality Readings by AQI Category', fontsize=14)
+        ax.set_xlabel('AQI Category', fontsize=12)
+        ax.set_ylabel('Number of Readings', fontsize=12)
+        ax.set_title('Distribution of Air Quality Readings by AQI Category', fontsize=14)
         
         # Rotate x-axis labels for better readability
-        plt.xticks(rotation=45, ha='right')
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
         
         # Add grid
-        plt.grid(True, alpha=0.3, axis='y')
+        ax.grid(True, alpha=0.3, axis='y')
         
         # Add explanatory text
-        plt.figtext(0.02, 0.02, f'Data as of {datetime.now().strftime("%Y-%m-%d %H:%M")}', fontsize=8)
+        fig.text(0.02, 0.02, f'Data as of {datetime.now().strftime("%Y-%m-%d %H:%M")}', fontsize=8)
         
-        # Adjust layout for rotated labels
-        plt.tight_layout()
+        # Leave room for the rotated labels
+        fig.subplots_adjust(left=0.07, right=0.97, top=0.94, bottom=0.3)
         
         # Save figure
-        output_path = os.path.join(VISUALIZATION_OUTPUT_DIR, f'{filename}.png')
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        output_path = save_figure(fig, filename)
         
         logger.info(f"Created AQI distribution chart at {output_path}")
     except Exception as e:
         logger.error(f"Error creating AQI distribution chart: {e}")
 
-def create_aqi_heatmap(df, filename):
+def create_aqi_heatmap(pivot_df, filename, ax):
     """
     Create a heatmap showing AQI by city and parameter.
     
     Args:
-        df: DataFrame with air quality readings
+        pivot_df: Average AQI by city and parameter, from fetch_city_param_means
         filename: Output filename
+        ax: Shared axes to draw on
     """
     try:
-        # Group data by city and parameter to calculate average AQI
-        pivot_df = df.pivot_table(
-            values='aqi',
-            index='city',
-            columns='parameter',
-            aggfunc='mean'
-        )
-        
         if pivot_df.empty:
             logger.warning("No data available for AQI heatmap")
             return
         
-        # Create figure
-        plt.figure(figsize=(10, 8))
+        # Clear the shared figure
+        reset_axes(ax, (10, 8))
+        fig = ax.figure
         
         # Create heatmap
         sns.heatmap(
@@ -347,21 +591,48 @@ def create_aqi_heatmap(df, filename):
             cmap='RdYlGn_r',  # Red-Yellow-Green color map (reversed)
             fmt='.1f',
             linewidths=.5,
-            cbar_kws={'label': 'Average AQI'}
+            cbar_kws={'label': 'Average AQI'},
+            ax=ax
         )
         
         # Set title
-        plt.title('Average Air Quality Index (AQI) by City and Pollutant', fontsize=14)
+        ax.set_title('Average Air Quality Index (AQI) by City and Pollutant', fontsize=14)
         
         # Save figure
-        output_path = os.path.join(VISUALIZATION_OUTPUT_DIR, f'{filename}.png')
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.subplots_adjust(left=0.15, right=0.98, top=0.93, bottom=0.1)
+        output_path = save_figure(fig, filename)
         
         logger.info(f"Created AQI heatmap at {output_path}")
     except Exception as e:
         logger.error(f"Error creating AQI heatmap: {e}")
 
+def shared_axes():
+    """
+    Get this process's reusable chart axes, creating them on first use.
+    
+    Returns:
+        Axes: Axes shared by the single-axes charts drawn in this process
+    """
+    global _shared_ax
+    if _shared_ax is None:
+        _shared_ax = plt.subplots()[1]
+    return _shared_ax
+
+def render_chart(chart, data, target):
+    """
+    Render one chart; the unit of work for the chart worker processes.
+    
+    Args:
+        chart: Chart function to call
+        data: Data the chart function draws
+        target: Output filename, or the list of (parameter, filename) pairs
+            for create_time_series_charts
+    """
+    if chart is create_time_series_charts:
+        chart(data, target)
+    else:
+        chart(data, target, shared_axes())
+
 def main():
     """Main function to create visualizations."""
     logger.info("Starting visualization generation")
@@ -373,27 +644,55 @@ def main():
         return
     
     try:
-        # Get the latest data
-        df = get_latest_readings(connection)
+        # The charts only run SELECTs, so skip transaction bookkeeping
+        connection.set_session(readonly=True, autocommit=True)
+        
+        # Reuse cached results while no newer readings have arrived within the hour
+        days = 7
+        latest = fetch_latest_timestamp(connection)
+        cache_key = f"{days}_{latest:%Y%m%d%H%M%S}_{datetime.now():%Y%m%d%H}" if latest is not None else None
+        
+        # Get the aggregated data each chart needs
+        counts_df = cached_query(
+            'category_counts', cache_key,
+            lambda: fetch_category_counts(connection, days).reset_index()
+        )
+        category_counts = counts_df.set_index('aqi_category')['count'] if not counts_df.empty else pd.Series(dtype='int64')
         
-        if df.empty:
+        if category_counts.empty:
             logger.warning("No data available for visualization")
             return
         
-        # Create visualizations
-        create_time_series_chart(df, 'pm25', 'pm25_time_series')
-        create_time_series_chart(df, 'o3', 'o3_time_series')
-        create_time_series_chart(df, 'no2', 'no2_time_series')
-        create_aqi_comparison_chart(df, 'aqi_comparison')
-        create_aqi_distribution_chart(df, 'aqi_distribution')
-        create_aqi_heatmap(df, 'aqi_heatmap')
+        timeseries_df = cached_query('timeseries', cache_key, lambda: fetch_timeseries(connection, days))
+        means_df = cached_query('city_param_means', cache_key, lambda: fetch_city_param_means(connection, days), index='city')
+        
+        # Give each time series chart only its own parameter's rows
+        by_parameter = dict(iter(timeseries_df.groupby('parameter', observed=True)))
+        jobs = [
+            (create_time_series_charts, by_parameter.get(parameter, timeseries_df.iloc[:0]), [(parameter, filename)])
+            for parameter, filename in TIME_SERIES_CHARTS
+        ]
+        jobs += [
+            (create_aqi_comparison_chart, means_df, 'aqi_comparison'),
+            (create_aqi_distribution_chart, category_counts, 'aqi_distribution'),
+            (create_aqi_heatmap, means_df, 'aqi_heatmap')
+        ]
+        
+        # Create visualizations; the charts are independent, so render them in parallel
+        with ProcessPoolExecutor(max_workers=min(CHART_WORKERS, len(jobs))) as executor:
+            list(executor.map(render_chart, *zip(*jobs)))
         
         logger.info("Visualization generation completed successfully")
     except Exception as e:
         logger.error(f"Error in visualization process: {e}")
     finally:
-        connection.close()
-        logger.info("Database connection closed")
+        # Restore the default session before other modules reuse the connection
+        try:
+            connection.set_session(readonly='DEFAULT', autocommit=False)
+        except psycopg2.Error as e:
+            logger.warning(f"Could not reset database session: {e}")
+        release_connection(connection)
+        logger.info("Database connection returned to pool")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+# tests/test_extract.py
+
+import os
+import sys
+import tempfile
+import types
+import unittest
+import pyarrow.parquet as pq
+
+# config.py is local to each deployment, so point a minimal one at a temporary directory
+TEMP_DIR = tempfile.mkdtemp()
+sys.modules.setdefault('config', types.SimpleNamespace(
+    OPENAQ_API_KEY='', AIRNOW_API_KEY='',
+    OPENAQ_V3_ENDPOINT='', AIRNOW_ENDPOINT='',
+    CITIES=['Los Angeles'], PARAMETERS=['pm25'],
+    LA_ZIP='90001', RAW_DATA_DIR=TEMP_DIR,
+    LOG_FILE=os.path.join(TEMP_DIR, 'test.log'), LOG_LEVEL='INFO'
+))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import extract
+
+class SaveDataTest(unittest.TestCase):
+    def test_api_timestamps_are_kept_as_strings(self):
+        record = {
+            'location': 'Los Angeles Downtown',
+            'parameter': 'pm25',
+            'value': 12.3,
+            'unit': 'µg/m³',
+            'date': {
+                'utc': '2025-05-19T19:00:00Z',
+                'local': '2025-05-19T12:00:00-07:00'
+            },
+            'coordinates': {'latitude': 34.05, 'longitude': -118.24}
+        }
+
+        extract.save_data({'results': [record]}, 'Los Angeles', 'pm25', 'test')
+
+        table = pq.read_table(os.path.join(TEMP_DIR, 'Los Angeles_pm25_test.parquet'))
+        row = table.to_pylist()[0]
+        self.assertEqual(str(table.schema.field('date.utc').type), 'string')
+        self.assertEqual(str(table.schema.field('date.local').type), 'string')
+        self.assertEqual(row['date.utc'], '2025-05-19T19:00:00Z')
+        self.assertEqual(row['date.local'], '2025-05-19T12:00:00-07:00')
+        self.assertEqual(row['coordinates.latitude'], 34.05)
+
+if __name__ == '__main__':
+    unittest.main()